@@ -1,8 +1,17 @@
 # job_io.py
 from __future__ import annotations
+import atexit
 import json
 import os
-from typing import Any
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+# Background writer for non-critical artifacts (audit/debug files).
+# One worker: writes run in submit order, so a later write to the same path always wins.
+# Pending writes are flushed on interpreter exit.
+_IO_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix="io-write")
+atexit.register(_IO_POOL.shutdown)
 
 def contact_dir(job_dir: str, contact_id: str) -> str:
     d = os.path.join(job_dir, "contacts", str(contact_id))
@@ -16,3 +25,19 @@ def write_json(path: str, data: Any) -> None:
 def write_text(path: str, text: str) -> None:
     with open(path, "w", encoding="utf-8") as f:
         f.write(text or "")
+
+def write_behind(fn: Callable[..., None], *args: Any) -> Future:
+    """
+    Submit a write to the background pool and return immediately.
+    Only use for files nobody reads back in the same request, and never for a path
+    that is also written synchronously (the queued write could land after it).
+    Failures are printed, not raised.
+    """
+    fut = _IO_POOL.submit(fn, *args)
+    fut.add_done_callback(_report_write_error)
+    return fut
+
+def _report_write_error(fut: Future) -> None:
+    exc = None if fut.cancelled() else fut.exception()
+    if exc is not None:
+        traceback.print_exception(type(exc), exc, exc.__traceback__)
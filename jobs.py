@@ -21,6 +21,8 @@ class ContactState:
     error: str = ""
     verified: bool = False   # for Step4 review
 
+_FINAL_JOB_STATUS = frozenset({"done", "error"})
+
 class JobStore:
     def __init__(self, base_dir: str = "output/jobs"):
         self.base_dir = base_dir
@@ -38,7 +40,8 @@ class JobStore:
             self.jobs[job_id] = {
                 "id": job_id,
                 "created_at": time.time(),
-                "status": "created",  # created|running|done|error
+                "status": "created",  # created|queued|running|done|error
+                "error": "",
                 "meta": meta,
                 "contacts": {},       # contact_id -> ContactState (as dict)
                 "events": queue.Queue(),
@@ -54,10 +57,12 @@ class JobStore:
         # event for SSE
         self.jobs[job_id]["events"].put(event)
 
-    def set_status(self, job_id: str, status: str) -> None:
+    def set_status(self, job_id: str, status: str, error: str = "") -> None:
+        # error: job-level failure (e.g. exception escaping the pipeline), shown on the dashboard
         with self.lock:
             self.jobs[job_id]["status"] = status
-        self.emit(job_id, {"type": "job_status", "status": status})
+            self.jobs[job_id]["error"] = error
+        self.emit(job_id, {"type": "job_status", "status": status, "error": error})
 
     def upsert_contact(self, job_id: str, contact_id: str, state: ContactState) -> None:
         with self.lock:
@@ -82,20 +87,39 @@ class JobStore:
             return {
                 "id": job["id"],
                 "status": job["status"],
+                "error": job.get("error", ""),
                 "meta": job["meta"],
                 "progress": dict(job["progress"]),
                 "contacts": dict(job["contacts"]),
                 "job_dir": job["job_dir"],
             }
 
-    def stream_events(self, job_id: str):
-        q: queue.Queue = self.jobs[job_id]["events"]
+    def stream_events(self, job_id: str, max_seconds: float = 300.0):
+        """
+        Yields the current job status, then queued events until the job is finished
+        (done/error) or max_seconds passed. Ending the stream frees the server thread;
+        EventSource reconnects by itself, queued events wait in the job's queue until then.
+        """
+        job = self.jobs[job_id]
+        q: queue.Queue = job["events"]
+        deadline = time.monotonic() + max_seconds
+        next_ping = time.monotonic() + 25
+        yield {"type": "job_status", "status": job["status"], "error": job.get("error", "")}
         while True:
+            # all tabs of a job share the queue: check the status itself, not only our events
+            if job["status"] in _FINAL_JOB_STATUS and q.empty():
+                return
+            now = time.monotonic()
+            if now >= deadline:
+                return
             try:
-                ev = q.get(timeout=25)
-                yield ev
+                ev = q.get(timeout=min(1.0, deadline - now))
             except queue.Empty:
-                # keep-alive ping for SSE
-                yield {"type": "ping", "ts": time.time()}
+                if now >= next_ping:
+                    # keep-alive ping for SSE
+                    next_ping = now + 25
+                    yield {"type": "ping", "ts": time.time()}
+                continue
+            yield ev
 
 JOB_STORE = JobStore()
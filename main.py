@@ -14,9 +14,15 @@ def main() -> None:
     parser.add_argument("--host", default="127.0.0.1", help="Host (default: 127.0.0.1)")
     parser.add_argument("--port", type=int, default=5055, help="Port (default: 5055)")
     parser.add_argument("--no-open", action="store_true", help="Browser nicht automatisch öffnen")
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=None,
+        help="Server-Threads (default: UI_THREADS oder 64; je offenem Dashboard wird einer belegt)",
+    )
     args = parser.parse_args()
 
-    run_ui(host=args.host, port=args.port, open=(not args.no_open))
+    run_ui(host=args.host, port=args.port, open=(not args.no_open), threads=args.threads)
 
 
 if __name__ == "__main__":
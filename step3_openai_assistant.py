@@ -4,8 +4,11 @@ from __future__ import annotations
 import json
 import os
 import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Any
+from pathlib import Path
+from typing import Any, Callable, Iterator, TextIO
 
 from config import AppConfig, OpenAIConfig, load_config
 from openai_assistant_client import OpenAIAssistantClient
@@ -95,31 +98,213 @@ def _flatten_churn_reasons(items: Any) -> str:
     return "\n".join(parts)
 
 
+# Scalar text columns of the Step3 review CSV -> path inside the AI JSON.
+_STEP3_TEXT_COLUMNS: dict[str, list[str]] = {
+    "summary_one_liner": ["summary", "one_liner"],
+    "summary_short": ["summary", "short"],
+    "time_range_from": ["summary", "time_range", "from"],
+    "time_range_to": ["summary", "time_range", "to"],
+    "data_recency_note": ["summary", "data_recency_note"],
+    "relationship_explanation": ["relationship_value", "explanation"],
+}
+
+
+def _build_projector(schema_paths: dict[str, list[str]]) -> Callable[[dict[str, Any]], dict[str, str]]:
+    """
+    Compiles a specialized "parsed -> csv columns" function for a fixed set of paths.
+    Same semantics as str(_get(parsed, path, "") or ""), but each shared prefix
+    (e.g. summary, summary.time_range) is looked up once per row instead of per column.
+    """
+    lines = ["def project(p):"]
+    var_for: dict[tuple[str, ...], str] = {(): "p"}
+    fields: list[str] = []
+
+    for col, path in schema_paths.items():
+        for i in range(1, len(path)):
+            prefix = tuple(path[:i])
+            if prefix in var_for:
+                continue
+            var = f"d{len(var_for)}"
+            lines.append(f"    {var} = {var_for[prefix[:-1]]}.get({prefix[-1]!r})")
+            lines.append(f"    if not isinstance({var}, dict): {var} = _EMPTY")
+            var_for[prefix] = var
+        parent = var_for[tuple(path[:-1])]
+        fields.append(f"        {col!r}: str({parent}.get({path[-1]!r}) or ''),")
+
+    lines.append("    return {")
+    lines.extend(fields)
+    lines.append("    }")
+
+    namespace: dict[str, Any] = {"_EMPTY": {}}
+    exec("\n".join(lines), namespace)
+    return namespace["project"]
+
+
+_PROJECT_STEP3_TEXT = _build_projector(_STEP3_TEXT_COLUMNS)
+
+
+_REQUIRED_KEYS_ORDERED = (
+    "summary",
+    "successes",
+    "challenges",
+    "churn_reasons",
+    "relationship_value",
+    "next_best_actions",
+    "open_questions_for_review",
+    "red_flags",
+)
+_REQUIRED_KEYS = frozenset(_REQUIRED_KEYS_ORDERED)
+
+
 def _validate_schema_min(parsed: dict[str, Any]) -> tuple[bool, str]:
     """
     Minimal validation: must be dict and contain the top-level keys we need.
     Keep it light to avoid false negatives.
     """
-    required = [
-        "summary",
-        "successes",
-        "challenges",
-        "churn_reasons",
-        "relationship_value",
-        "next_best_actions",
-        "open_questions_for_review",
-        "red_flags",
-    ]
-    for k in required:
-        if k not in parsed:
-            return False, f"missing_key:{k}"
-    if not isinstance(parsed.get("summary"), dict):
+    if not _REQUIRED_KEYS.issubset(parsed.keys()):
+        # slow path only on failure: report the first missing key in schema order
+        missing = next(k for k in _REQUIRED_KEYS_ORDERED if k not in parsed)
+        return False, f"missing_key:{missing}"
+    if type(parsed["summary"]) is not dict:
         return False, "summary_not_dict"
-    if not isinstance(parsed.get("relationship_value"), dict):
+    if type(parsed["relationship_value"]) is not dict:
         return False, "relationship_value_not_dict"
     return True, ""
 
 
+def _iter_step3_raw(
+    rows: list[dict[str, str]],
+    client: OpenAIAssistantClient,
+    extra_user_prompt: str,
+) -> Iterator[tuple[str, str, str]]:
+    """
+    Network side of Step3: yields (email, contact_id, raw) per usable row.
+    """
+    for r in rows:
+        email = (r.get("email", "") or "").strip()
+        contact_id = (r.get("hubspot_contact_id", "") or "").strip()
+        merged_text = (r.get("merged_context_text", "") or "").strip()
+
+        if not contact_id or not merged_text:
+            continue
+
+        raw = client.summarize_with_assistant(
+            merged_context_text=merged_text,
+            extra_user_prompt=extra_user_prompt if extra_user_prompt.strip() else None,
+        )
+        yield email, contact_id, raw
+
+
+def _postprocess_step3_row(
+    email: str,
+    contact_id: str,
+    raw: str,
+) -> tuple[dict[str, Any], dict[str, Any] | None, dict[str, Any] | None]:
+    """
+    CPU side of Step3: parse + validate + flatten one assistant answer.
+    Pure function (no shared state), so it can run in a worker process.
+
+    Returns (audit_record, out_row, failed_row); exactly one of out_row/failed_row is set.
+    """
+    parsed: dict[str, Any] | None = None
+    parse_error = ""
+    schema_ok = False
+    schema_error = ""
+
+    try:
+        parsed_candidate = json.loads(raw)
+        if isinstance(parsed_candidate, dict):
+            parsed = parsed_candidate
+            schema_ok, schema_error = _validate_schema_min(parsed)
+        else:
+            parse_error = "json_not_object"
+    except Exception as e:
+        parse_error = f"json_parse_error:{type(e).__name__}"
+
+    # jsonl audit record is written regardless
+    record = {
+        "email": email,
+        "hubspot_contact_id": contact_id,
+        "raw": raw,
+        "parsed": parsed,
+        "parse_error": parse_error,
+        "schema_ok": schema_ok,
+        "schema_error": schema_error,
+    }
+
+    if not parsed or parse_error or not schema_ok:
+        failed_row = {
+            "hubspot_contact_id": contact_id,
+            "email": email,
+            "error": parse_error or schema_error or "unknown_error",
+            "raw": raw,
+        }
+        return record, None, failed_row
+
+    # flatten important fields for review
+    rel_score = _get(parsed, ["relationship_value", "score_1_to_5"], "")
+    rel_pos = _join_list(_get(parsed, ["relationship_value", "signals_positive"], []), sep=" | ")
+    rel_neg = _join_list(_get(parsed, ["relationship_value", "signals_negative"], []), sep=" | ")
+
+    successes_txt = _flatten_successes(parsed.get("successes"))
+    challenges_txt = _flatten_challenges(parsed.get("challenges"))
+    churn_txt = _flatten_churn_reasons(parsed.get("churn_reasons"))
+
+    next_actions = parsed.get("next_best_actions", [])
+    next_actions_txt = ""
+    if isinstance(next_actions, list) and next_actions:
+        lines = []
+        for a in next_actions:
+            if not isinstance(a, dict):
+                continue
+            action = (a.get("action") or "").strip()
+            why = (a.get("why") or "").strip()
+            prio = (a.get("priority") or "").strip()
+            line = action
+            if prio:
+                line = f"[{prio}] {line}" if line else f"[{prio}]"
+            if why:
+                line = f"{line} — {why}" if line else why
+            if line:
+                lines.append(line)
+        next_actions_txt = "\n".join(lines)
+
+    open_q_txt = _join_list(parsed.get("open_questions_for_review"), sep=" | ")
+    red_flags_txt = _join_list(parsed.get("red_flags"), sep=" | ")
+
+    out_row = {
+        "hubspot_contact_id": contact_id,
+        "email": email,
+        **_PROJECT_STEP3_TEXT(parsed),
+        "successes": successes_txt,
+        "challenges": challenges_txt,
+        "churn_reasons": churn_txt,
+        "relationship_score_1_to_5": rel_score,
+        "relationship_signals_positive": rel_pos,
+        "relationship_signals_negative": rel_neg,
+        "next_best_actions": next_actions_txt,
+        "open_questions_for_review": open_q_txt,
+        "red_flags": red_flags_txt,
+        # full JSON for your renderer step later
+        "ai_json": _safe_json_dumps(parsed),
+    }
+    return record, out_row, None
+
+
+def _collect_step3_result(
+    jf: TextIO,
+    result: tuple[dict[str, Any], dict[str, Any] | None, dict[str, Any] | None],
+    out_rows: list[dict[str, Any]],
+    failed_rows: list[dict[str, Any]],
+) -> None:
+    record, out_row, failed_row = result
+    jf.write(_safe_json_dumps(record) + "\n")
+    if out_row is not None:
+        out_rows.append(out_row)
+    if failed_row is not None:
+        failed_rows.append(failed_row)
+
+
 def run_step3_openai_assistant(
     app_cfg: AppConfig,
     oa_cfg: OpenAIConfig,
@@ -138,127 +323,19 @@ def run_step3_openai_assistant(
     out_rows: list[dict[str, Any]] = []
     failed_rows: list[dict[str, Any]] = []
 
-    with open(jsonl_path, "w", encoding="utf-8") as jf:
-        for r in rows:
-            email = (r.get("email", "") or "").strip()
-            contact_id = (r.get("hubspot_contact_id", "") or "").strip()
-            merged_text = (r.get("merged_context_text", "") or "").strip()
+    # parse/flatten of a reply runs on a helper thread while the next assistant call
+    # is in flight (the call waits on the network, not the GIL). Threads, not processes:
+    # the per-row work is small, and forking from the UI process (waitress/pipeline/io
+    # threads holding locks) risks deadlocked children. Results are consumed in order.
+    pending: deque[Future] = deque()
+    with open(jsonl_path, "w", encoding="utf-8") as jf, ThreadPoolExecutor(max_workers=1, thread_name_prefix="step3-post") as pool:
+        for email, contact_id, raw in _iter_step3_raw(rows, client, extra_user_prompt):
+            pending.append(pool.submit(_postprocess_step3_row, email, contact_id, raw))
+            while pending and pending[0].done():
+                _collect_step3_result(jf, pending.popleft().result(), out_rows, failed_rows)
 
-            if not contact_id or not merged_text:
-                continue
-
-            raw = client.summarize_with_assistant(
-                merged_context_text=merged_text,
-                extra_user_prompt=extra_user_prompt if extra_user_prompt.strip() else None,
-            )
-
-            record_base = {
-                "email": email,
-                "hubspot_contact_id": contact_id,
-            }
-
-            parsed: dict[str, Any] | None = None
-            parse_error = ""
-            schema_ok = False
-            schema_error = ""
-
-            try:
-                parsed_candidate = json.loads(raw)
-                if isinstance(parsed_candidate, dict):
-                    parsed = parsed_candidate
-                    schema_ok, schema_error = _validate_schema_min(parsed)
-                else:
-                    parse_error = "json_not_object"
-            except Exception as e:
-                parse_error = f"json_parse_error:{type(e).__name__}"
-
-            # write jsonl for audit regardless
-            jf.write(
-                _safe_json_dumps(
-                    {
-                        **record_base,
-                        "raw": raw,
-                        "parsed": parsed,
-                        "parse_error": parse_error,
-                        "schema_ok": schema_ok,
-                        "schema_error": schema_error,
-                    }
-                )
-                + "\n"
-            )
-
-            if not parsed or parse_error or not schema_ok:
-                failed_rows.append(
-                    {
-                        "hubspot_contact_id": contact_id,
-                        "email": email,
-                        "error": parse_error or schema_error or "unknown_error",
-                        "raw": raw,
-                    }
-                )
-                continue
-
-            # flatten important fields for review
-            summary_one_liner = str(_get(parsed, ["summary", "one_liner"], "") or "")
-            summary_short = str(_get(parsed, ["summary", "short"], "") or "")
-            time_from = str(_get(parsed, ["summary", "time_range", "from"], "") or "")
-            time_to = str(_get(parsed, ["summary", "time_range", "to"], "") or "")
-            recency_note = str(_get(parsed, ["summary", "data_recency_note"], "") or "")
-
-            rel_score = _get(parsed, ["relationship_value", "score_1_to_5"], "")
-            rel_expl = str(_get(parsed, ["relationship_value", "explanation"], "") or "")
-            rel_pos = _join_list(_get(parsed, ["relationship_value", "signals_positive"], []), sep=" | ")
-            rel_neg = _join_list(_get(parsed, ["relationship_value", "signals_negative"], []), sep=" | ")
-
-            successes_txt = _flatten_successes(parsed.get("successes"))
-            challenges_txt = _flatten_challenges(parsed.get("challenges"))
-            churn_txt = _flatten_churn_reasons(parsed.get("churn_reasons"))
-
-            next_actions = parsed.get("next_best_actions", [])
-            next_actions_txt = ""
-            if isinstance(next_actions, list) and next_actions:
-                lines = []
-                for a in next_actions:
-                    if not isinstance(a, dict):
-                        continue
-                    action = (a.get("action") or "").strip()
-                    why = (a.get("why") or "").strip()
-                    prio = (a.get("priority") or "").strip()
-                    line = action
-                    if prio:
-                        line = f"[{prio}] {line}" if line else f"[{prio}]"
-                    if why:
-                        line = f"{line} — {why}" if line else why
-                    if line:
-                        lines.append(line)
-                next_actions_txt = "\n".join(lines)
-
-            open_q_txt = _join_list(parsed.get("open_questions_for_review"), sep=" | ")
-            red_flags_txt = _join_list(parsed.get("red_flags"), sep=" | ")
-
-            out_rows.append(
-                {
-                    "hubspot_contact_id": contact_id,
-                    "email": email,
-                    "summary_one_liner": summary_one_liner,
-                    "summary_short": summary_short,
-                    "time_range_from": time_from,
-                    "time_range_to": time_to,
-                    "data_recency_note": recency_note,
-                    "successes": successes_txt,
-                    "challenges": challenges_txt,
-                    "churn_reasons": churn_txt,
-                    "relationship_score_1_to_5": rel_score,
-                    "relationship_explanation": rel_expl,
-                    "relationship_signals_positive": rel_pos,
-                    "relationship_signals_negative": rel_neg,
-                    "next_best_actions": next_actions_txt,
-                    "open_questions_for_review": open_q_txt,
-                    "red_flags": red_flags_txt,
-                    # full JSON for your renderer step later
-                    "ai_json": _safe_json_dumps(parsed),
-                }
-            )
+        while pending:
+            _collect_step3_result(jf, pending.popleft().result(), out_rows, failed_rows)
 
     if out_rows:
         fields = [
@@ -318,30 +395,25 @@ def rerun_step3_from_local_context(
     Returns:
       {"ok": bool, "error": str, "step3_ai_path": str}
     """
-    contact_dir = os.path.abspath(contact_dir)
-    if not os.path.isdir(contact_dir):
+    d = Path(contact_dir).resolve()
+    if not d.is_dir():
         return {"ok": False, "error": "contact_dir_not_found", "step3_ai_path": ""}
 
     # Load configs from .env
     app_cfg, _trello_cfg, _hs_cfg, oa_cfg = load_config()
     client = OpenAIAssistantClient(oa_cfg)
 
-    meta_path = os.path.join(contact_dir, "meta.json")
-    meta = {}
-    if os.path.exists(meta_path):
-        try:
-            with open(meta_path, "r", encoding="utf-8") as f:
-                meta = json.load(f) or {}
-        except Exception:
-            meta = {}
+    try:
+        meta = json.loads((d / "meta.json").read_text(encoding="utf-8")) or {}
+    except Exception:
+        meta = {}
 
-    merged_path = os.path.join(contact_dir, "step2_merged_context.txt")
-    merged_text = _read_text_file(merged_path)
+    merged_text = _read_text_file(d / "step2_merged_context.txt")
 
     # fallback: if merged missing, combine step1 + step2 texts
     if not merged_text.strip():
-        t1 = _read_text_file(os.path.join(contact_dir, "step1_trello_text.txt"))
-        h2 = _read_text_file(os.path.join(contact_dir, "step2_hubspot_text.txt"))
+        t1 = _read_text_file(d / "step1_trello_text.txt")
+        h2 = _read_text_file(d / "step2_hubspot_text.txt")
         merged_text = _build_fallback_merged_context(t1, h2)
 
     if not merged_text.strip():
@@ -354,10 +426,8 @@ def rerun_step3_from_local_context(
     )
 
     # Persist raw
-    raw_path = os.path.join(contact_dir, "step3_raw.txt")
     try:
-        with open(raw_path, "w", encoding="utf-8") as f:
-            f.write(raw or "")
+        (d / "step3_raw.txt").write_text(raw or "", encoding="utf-8")
     except Exception:
         pass
 
@@ -377,8 +447,9 @@ def rerun_step3_from_local_context(
         parse_error = f"json_parse_error:{type(e).__name__}"
 
     if not parsed or parse_error or not schema_ok:
-        # Persist debug meta
-        debug_path = os.path.join(contact_dir, "step3_rerun_meta.json")
+        # Persist debug meta. Synchronous: the success path below writes the same file,
+        # a queued failure write could otherwise overwrite a later successful rerun.
+        debug_path = d / "step3_rerun_meta.json"
         _write_json_safely(
             debug_path,
             {
@@ -398,11 +469,11 @@ def rerun_step3_from_local_context(
         }
 
     # Persist parsed AI JSON
-    ai_path = os.path.join(contact_dir, "step3_ai.json")
+    ai_path = d / "step3_ai.json"
     _write_json_safely(ai_path, parsed)
 
-    # Persist audit meta
-    debug_path = os.path.join(contact_dir, "step3_rerun_meta.json")
+    # Persist audit meta (synchronous: this is the record of a successful rerun)
+    debug_path = d / "step3_rerun_meta.json"
     _write_json_safely(
         debug_path,
         {
@@ -414,24 +485,22 @@ def rerun_step3_from_local_context(
         },
     )
 
-    return {"ok": True, "error": "", "step3_ai_path": ai_path}
+    return {"ok": True, "error": "", "step3_ai_path": str(ai_path)}
 
 
 # ----------------------------
 # Local helper functions (private)
 # ----------------------------
 
-def _read_text_file(path: str) -> str:
-    if not os.path.exists(path):
-        return ""
+def _read_text_file(path: Path) -> str:
+    # no exists() pre-check: a missing file is just a failed open
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            return f.read()
+        return path.read_text(encoding="utf-8")
     except Exception:
         return ""
 
 
-def _write_json_safely(path: str, obj: Any) -> None:
+def _write_json_safely(path: str | Path, obj: Any) -> None:
     try:
         with open(path, "w", encoding="utf-8") as f:
             json.dump(obj, f, ensure_ascii=False, indent=2)
@@ -1,16 +1,21 @@
 # step4_render_hubspot_html.py
 from __future__ import annotations
 
+import functools
 import json
 import os
+import re
 import time
 from dataclasses import dataclass
+from pathlib import Path
 from typing import Any
 
 from openai import OpenAI
 
 from config import AppConfig, OpenAIConfig, load_config
+from job_io import write_behind
 from utils_csv import read_csv_rows, write_csv_rows
+from utils_json import loads as fast_json_loads, read_json_file
 
 
 # --- OPTIMIERTER SYSTEM PROMPT (ENTWURF 1 - FAKTEN BASIERT) ---
@@ -60,6 +65,9 @@ Regeln für die KI:
 
 HTML_RENDER_USER_PROMPT_PREFIX = "Erstelle die 15-Sekunden-Sales-Übersicht aus diesem JSON:\n\n"
 
+# Markdown code fences the model sometimes adds despite the prompt (```html / ```)
+_FENCE_RE = re.compile(r"```(?:html)?")
+
 
 @dataclass(frozen=True)
 class Step4Input:
@@ -75,7 +83,7 @@ class Step4Outputs:
 
 def _safe_json_loads(s: str) -> dict[str, Any] | None:
     try:
-        obj = json.loads(s)
+        obj = fast_json_loads(s)
         return obj if isinstance(obj, dict) else None
     except Exception:
         return None
@@ -110,7 +118,7 @@ def _render_html_via_responses(
                 raise RuntimeError("Empty output_text from model")
             
             # Clean potential markdown block markers if model ignores instructions
-            cleaned_html = str(html).strip().replace("```html", "").replace("```", "")
+            cleaned_html = _FENCE_RE.sub("", str(html).strip())
             
             return cleaned_html
 
@@ -205,8 +213,8 @@ def rerun_step4_from_local_ai(
     """
     Re-run Step4 for a single contact using already stored local Step3 output.
     """
-    contact_dir = os.path.abspath(contact_dir)
-    if not os.path.isdir(contact_dir):
+    d = Path(contact_dir).resolve()
+    if not d.is_dir():
         return {"ok": False, "error": "contact_dir_not_found", "step4_html_path": ""}
 
     # Load configs from .env
@@ -219,13 +227,13 @@ def rerun_step4_from_local_ai(
         # last resort default
         model = "gpt-4o-mini" # Updated to current standard mini model
 
-    meta = _safe_read_json(os.path.join(contact_dir, "meta.json"))
+    meta = _safe_read_json(d / "meta.json")
 
     # Load AI payload
-    payload = _safe_read_json(os.path.join(contact_dir, "step3_ai.json"))
+    payload = _read_ai_payload(d / "step3_ai.json")
     if not payload:
-        raw = _safe_read_text(os.path.join(contact_dir, "step3_raw.txt")).strip()
-        payload = _safe_json_loads(raw) or {}
+        raw = _safe_read_text(d / "step3_raw.txt").strip()
+        payload = (_safe_json_loads(raw) if raw else None) or {}
 
     if not payload:
         return {"ok": False, "error": "missing_step3_ai", "step4_html_path": ""}
@@ -239,12 +247,13 @@ def rerun_step4_from_local_ai(
             backoff_base_seconds=oa_cfg.backoff_base_seconds,
         )
 
-        html_path = os.path.join(contact_dir, "step4_note.html")
-        with open(html_path, "w", encoding="utf-8") as f:
-            f.write(html_note)
+        html_path = d / "step4_note.html"
+        html_path.write_text(html_note, encoding="utf-8")
 
-        _safe_write_json(
-            os.path.join(contact_dir, "step4_rerun_meta.json"),
+        # audit meta is not read back by the UI -> write in background
+        write_behind(
+            _safe_write_json,
+            d / "step4_rerun_meta.json",
             {
                 "ts": int(time.time()),
                 "ok": True,
@@ -254,11 +263,12 @@ def rerun_step4_from_local_ai(
             },
         )
 
-        return {"ok": True, "error": "", "step4_html_path": html_path}
+        return {"ok": True, "error": "", "step4_html_path": str(html_path)}
 
     except Exception as e:
-        _safe_write_json(
-            os.path.join(contact_dir, "step4_failed_render.json"),
+        write_behind(
+            _safe_write_json,
+            d / "step4_failed_render.json",
             {
                 "ts": int(time.time()),
                 "ok": False,
@@ -275,28 +285,42 @@ def rerun_step4_from_local_ai(
 # Local helper functions (private)
 # ----------------------------
 
-def _safe_read_text(path: str) -> str:
-    if not os.path.exists(path):
-        return ""
+def _safe_read_text(path: Path) -> str:
+    # no exists() pre-check: a missing file is just a failed open
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            return f.read()
+        return path.read_text(encoding="utf-8")
     except Exception:
         return ""
 
 
-def _safe_read_json(path: str) -> dict[str, Any]:
-    if not os.path.exists(path):
-        return {}
+def _safe_read_json(path: Path) -> dict[str, Any]:
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            obj = json.load(f)
+        obj = read_json_file(path)
         return obj if isinstance(obj, dict) else {}
     except Exception:
         return {}
 
 
-def _safe_write_json(path: str, obj: Any) -> None:
+def _read_ai_payload(path: Path) -> dict[str, Any]:
+    """
+    step3_ai.json via a parse cache: repeated Step4 reruns for the same contact
+    only pay one stat() as long as the file is unchanged.
+    The returned dict is shared between callers -> treat as read-only.
+    """
+    try:
+        mtime_ns = path.stat().st_mtime_ns
+    except OSError:
+        return {}
+    return _load_ai_payload(str(path), mtime_ns)
+
+
+@functools.lru_cache(maxsize=256)
+def _load_ai_payload(path: str, mtime_ns: int) -> dict[str, Any]:
+    # mtime_ns is only part of the cache key: a rewritten file gets a fresh entry
+    return _safe_read_json(Path(path))
+
+
+def _safe_write_json(path: str | Path, obj: Any) -> None:
     try:
         with open(path, "w", encoding="utf-8") as f:
             json.dump(obj, f, ensure_ascii=False, indent=2)
@@ -1,11 +1,26 @@
 # ui/app.py
 from __future__ import annotations
 
+import os
 import threading
 import webbrowser
+from typing import Any, Optional
 
 from flask import Flask
+from flask.json.provider import DefaultJSONProvider
 
+try:
+    from waitress import serve
+except ImportError:  # optional; falls back to Flask's (threaded) dev server
+    serve = None
+
+try:
+    from flask_compress import Compress
+except ImportError:  # optional; responses are then sent uncompressed
+    Compress = None
+
+from utils_json import orjson
+from ui.routes_core import bp_core
 from ui.routes_search import bp_search
 from ui.routes_contact import bp_contact
 from ui.routes_job import bp_job
@@ -19,6 +34,28 @@ def _open_browser(url: str) -> None:
         pass
 
 
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson (if installed).
+    Falls back to the default provider for json.dumps-specific kwargs it can't map.
+    Dates keep Flask's HTTP-date format (passed through to the default hook).
+    """
+    sort_keys = False
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if orjson is None or set(kwargs) - {"indent", "separators"}:
+            return super().dumps(obj, **kwargs)
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode("utf-8")
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+
 def create_app() -> Flask:
     """
     Unified Flask app (modular).
@@ -30,7 +67,18 @@ def create_app() -> Flask:
     """
     app = Flask(__name__)
     app.config["MAX_CONTENT_LENGTH"] = 50 * 1024 * 1024  # 50MB Upload-Schutz
+    app.json = OrjsonProvider(app)
+
+    if Compress is not None:
+        # br/gzip for HTML/CSS/JSON; streamed responses (SSE events, contact page)
+        # stay uncompressed so chunks reach the browser immediately
+        app.config.setdefault("COMPRESS_ALGORITHM", ["br", "gzip"])
+        app.config.setdefault("COMPRESS_BR_LEVEL", 4)
+        app.config.setdefault("COMPRESS_MIN_SIZE", 1024)
+        app.config.setdefault("COMPRESS_STREAMS", False)
+        Compress(app)
 
+    app.register_blueprint(bp_core)
     app.register_blueprint(bp_upload)
     app.register_blueprint(bp_search)
     app.register_blueprint(bp_contact)
@@ -39,12 +87,35 @@ def create_app() -> Flask:
     return app
 
 
-def run_ui(host: str = "127.0.0.1", port: int = 5055, open: bool = True) -> None:
+def _ui_threads() -> int:
+    try:
+        return max(4, int(os.getenv("UI_THREADS", "64")))
+    except ValueError:
+        return 64
+
+
+def run_ui(host: str = "127.0.0.1", port: int = 5055, open: bool = True, threads: Optional[int] = None) -> None:
     app = create_app()
     url = f"http://{host}:{port}/"
     if open:
         threading.Timer(0.6, lambda: _open_browser(url)).start()
-    app.run(host=host, port=port, debug=False)
+
+    if serve is None:
+        app.run(host=host, port=port, debug=False, threaded=True)
+        return
+
+    # Production WSGI server with a fixed thread pool. Each open dashboard holds one
+    # thread for its /events stream (ended on done/error, at the latest after 5 min;
+    # the browser reconnects), reruns hold one for their OpenAI call. Size it well
+    # above the expected number of open dashboards: UI_THREADS / --threads.
+    serve(
+        app,
+        host=host,
+        port=port,
+        threads=threads or _ui_threads(),
+        connection_limit=256,
+        channel_timeout=60,
+    )
 
 
 if __name__ == "__main__":
@@ -1,18 +1,30 @@
 # ui/indexer.py
 from __future__ import annotations
 
-import json
+import bisect
 import os
+import threading
 import time
-from dataclasses import dataclass, asdict
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, fields
+from itertools import islice
+from operator import attrgetter
 from typing import Any, Dict, List, Optional, Tuple
 
+from utils_json import dumps_bytes, read_json_file
+
+try:
+    import ijson  # optional: streaming parse of large artifacts
+except ImportError:
+    ijson = None
+
 
 # ----------------------------
 # Public data model
 # ----------------------------
 
-@dataclass
+@dataclass(slots=True)
 class ContactIndexEntry:
     """
     One entry per (job_id, contact_id).
@@ -40,17 +52,75 @@ class ContactIndexEntry:
     status: str = ""   # best-effort: done/error/duplicate/unknown
     step: str = ""     # best-effort: step1..step4/write/unknown
 
-    # Timestamps (best-effort)
-    updated_ts: float = 0.0
+    # Timestamps (best-effort): latest artifact mtime, in ns
+    updated_ts: int = 0
 
     # Paths (internal convenience)
     contact_dir: str = ""
 
+    # Lowercased search fields joined by "\x1f" (derived, never cached to disk)
+    _lc_blob: str = field(default="", init=False, repr=False, compare=False)
+
+
+# Fields persisted in the json cache (everything passed to __init__)
+_FIELD_NAMES: Tuple[str, ...] = tuple(f.name for f in fields(ContactIndexEntry) if f.init)
+
+
+# sort key for "most recently updated first" (C-level getter instead of a lambda frame per entry)
+_BY_UPDATED_TS = attrgetter("updated_ts")
+
+
+def _neg_updated_ts(e: ContactIndexEntry) -> int:
+    return -e.updated_ts
+
+
+def _classify_step1(step1_match: Optional[Dict[str, Any]]) -> Tuple[bool, str, str]:
+    """
+    (has_step1, trello_id, status) from step1_match.json in one pass.
+    trello_id is only set for a single match.
+    """
+    if not step1_match:
+        return False, "", ""
+    status = (step1_match.get("status") or "").strip()
+    trello_ids = step1_match.get("trello_ids")
+    trello_id = str(trello_ids[0]).strip() if isinstance(trello_ids, list) and len(trello_ids) == 1 else ""
+    return True, trello_id, status
+
+
+def _set_search_blob(e: ContactIndexEntry) -> None:
+    e._lc_blob = "\x1f".join((e.contact_id or "", e.email or "", e.trello_id or "", e.hubspot_note_id or "")).lower()
+
 
 # ----------------------------
 # Indexer (filesystem -> in-memory)
 # ----------------------------
 
+# n-gram size of the search index
+_SEARCH_GRAM = 3
+
+_SearchState = Tuple[
+    List[ContactIndexEntry],
+    Dict[str, set[Tuple[str, str]]],
+    Dict[Tuple[str, str], ContactIndexEntry],
+    Dict[Tuple[str, str], int],
+]
+
+# rebuild scans contact folders in parallel (I/O bound: threads overlap open/read/stat)
+_SCAN_WORKERS = min(32, (os.cpu_count() or 4) * 4)
+_SCAN_PARALLEL_MIN = 32
+
+# artifacts at least this big are stream-parsed for the few keys the index needs
+_STREAM_PARSE_MIN_BYTES = 64 * 1024
+
+
+def _entry_grams(e: ContactIndexEntry) -> set[str]:
+    # grams per field, so no gram spans the separator
+    out: set[str] = set()
+    for v in e._lc_blob.split("\x1f"):
+        out.update([v[j:j + _SEARCH_GRAM] for j in range(len(v) - _SEARCH_GRAM + 1)])
+    return out
+
+
 class ContactIndexer:
     """
     Lightweight filesystem indexer for existing job outputs.
@@ -73,7 +143,23 @@ class ContactIndexer:
         self.cache_ttl_seconds = cache_ttl_seconds
 
         self._entries: List[ContactIndexEntry] = []
-        self._last_built_ts: float = 0.0
+        self._last_built_ns: int = 0
+
+        # Serializes everything that replaces the published state (rebuild, cache load,
+        # update_one). Re-entrant: update_one -> get_entries -> rebuild.
+        # Readers take self._entries without it; the list is never mutated once published.
+        self._lock = threading.RLock()
+
+        # Incremental rebuild state (in-memory only, not part of the json cache):
+        # - contacts dir -> (dir mtime_ns, [(contact_id, contact_dir), ...])
+        # - contact dir  -> (dir mtime_ns, latest artifact mtime) of the last build
+        self._entries_by_key: Dict[Tuple[str, str], ContactIndexEntry] = {}
+        self._subdirs_by_dir: Dict[str, Tuple[int, List[Tuple[str, str]]]] = {}
+        self._dir_mtime: Dict[str, Tuple[int, int]] = {}
+
+        # Search index, published as one immutable tuple (see _search_index):
+        # (entries it belongs to, n-gram -> keys, key -> indexed entry, key -> position in entries)
+        self._search_state: Optional[_SearchState] = None
 
         os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
 
@@ -85,45 +171,126 @@ class ContactIndexer:
             return self._entries
 
         # if already built recently, return
-        if self._entries and (time.time() - self._last_built_ts) < self.cache_ttl_seconds:
+        if self._is_fresh():
             return self._entries
 
-        # try load from cache if valid
-        if self._load_cache_if_fresh():
-            return self._entries
+        with self._lock:
+            # another thread may have rebuilt while we waited
+            if self._is_fresh():
+                return self._entries
 
-        # else rebuild
-        self.rebuild()
-        return self._entries
+            # try load from cache if valid
+            if self._load_cache_if_fresh():
+                return self._entries
+
+            # else rebuild
+            self._rebuild()
+            return self._entries
 
     def rebuild(self) -> None:
+        with self._lock:
+            self._rebuild()
+
+    def _is_fresh(self) -> bool:
+        return bool(self._entries) and (time.time_ns() - self._last_built_ns) < self.cache_ttl_seconds * 1_000_000_000
+
+    def _rebuild(self) -> None:
         entries: List[ContactIndexEntry] = []
         if not os.path.isdir(self.jobs_base_dir):
             self._entries = []
-            self._last_built_ts = time.time()
+            self._entries_by_key = {}
+            self._subdirs_by_dir = {}
+            self._dir_mtime = {}
+            self._last_built_ns = time.time_ns()
             self._save_cache()
             return
 
-        for job_id in sorted(os.listdir(self.jobs_base_dir)):
-            job_dir = os.path.join(self.jobs_base_dir, job_id)
-            contacts_dir = os.path.join(job_dir, "contacts")
-            if not os.path.isdir(contacts_dir):
+        subdirs_by_dir: Dict[str, Tuple[int, List[Tuple[str, str]]]] = {}
+        work: List[Tuple[Tuple[str, str], str]] = []
+
+        # scandir: is_dir() comes from the directory listing itself (no extra stat per entry)
+        for job_entry in self._list_subdirs(self.jobs_base_dir):
+            contacts_dir = os.path.join(job_entry.path, "contacts")
+            try:
+                contacts_mtime = os.stat(contacts_dir).st_mtime_ns
+            except OSError:
                 continue
 
-            for contact_id in sorted(os.listdir(contacts_dir)):
-                cdir = os.path.join(contacts_dir, contact_id)
-                if not os.path.isdir(cdir):
-                    continue
-                entry = self._build_entry(job_id=job_id, contact_id=contact_id, contact_dir=cdir)
-                entries.append(entry)
+            # contact folders only appear/disappear via the contacts dir itself
+            cached = self._subdirs_by_dir.get(contacts_dir)
+            if cached and cached[0] == contacts_mtime:
+                contacts = cached[1]
+            else:
+                contacts = [(e.name, e.path) for e in self._list_subdirs(contacts_dir)]
+            subdirs_by_dir[contacts_dir] = (contacts_mtime, contacts)
+
+            work.extend(((job_entry.name, contact_id), cdir) for contact_id, cdir in contacts)
+
+        if len(work) >= _SCAN_PARALLEL_MIN:
+            with ThreadPoolExecutor(max_workers=_SCAN_WORKERS, thread_name_prefix="index-scan") as ex:
+                built = list(ex.map(lambda w: self._build_or_reuse(*w), work))
+        else:
+            built = [self._build_or_reuse(key, cdir) for key, cdir in work]
+
+        by_key: Dict[Tuple[str, str], ContactIndexEntry] = {}
+        dir_mtime: Dict[str, Tuple[int, int]] = {}
+        for (key, cdir), (entry, sig) in zip(work, built):
+            entries.append(entry)
+            by_key[key] = entry
+            dir_mtime[cdir] = sig
 
         # Sort: most recently updated first
-        entries.sort(key=lambda e: e.updated_ts, reverse=True)
+        entries.sort(key=_BY_UPDATED_TS, reverse=True)
 
         self._entries = entries
-        self._last_built_ts = time.time()
+        self._entries_by_key = by_key
+        self._subdirs_by_dir = subdirs_by_dir
+        self._dir_mtime = dir_mtime
+        self._last_built_ns = time.time_ns()
         self._save_cache()
 
+    def update_one(self, job_id: str, contact_id: str) -> Optional[ContactIndexEntry]:
+        """
+        Re-read a single contact folder after a route changed it and patch the result
+        into the in-memory index (no tree re-scan). The json cache is only rewritten
+        if the entry actually changed.
+        """
+        with self._lock:
+            self.get_entries()
+            key = (job_id, contact_id)
+            cdir = os.path.join(self.jobs_base_dir, job_id, "contacts", contact_id)
+            old = self._entries_by_key.get(key)
+
+            # always re-read: an in-place rewrite can land within the same mtime tick
+            self._dir_mtime.pop(cdir, None)
+            entry: Optional[ContactIndexEntry] = None
+            if os.path.isdir(cdir):
+                entry, sig = self._build_or_reuse(key, cdir)
+                self._dir_mtime[cdir] = sig
+
+            if entry == old:
+                # nothing visible changed: keep the old object (and the search index built on it)
+                return old
+
+            # new list object, so _search_index notices the change (and patches only this entry)
+            entries = self._entries.copy()
+            if old is not None:
+                # normally found by identity; fall back to the key if the list was replaced meanwhile
+                i = next((i for i, e in enumerate(entries) if e is old), None)
+                if i is None:
+                    i = next((i for i, e in enumerate(entries) if e.job_id == job_id and e.contact_id == contact_id), None)
+                if i is not None:
+                    del entries[i]
+                self._entries_by_key.pop(key, None)
+            if entry is not None:
+                # list is sorted by updated_ts descending == ascending by -updated_ts
+                entries.insert(bisect.bisect_left(entries, -entry.updated_ts, key=_neg_updated_ts), entry)
+                self._entries_by_key[key] = entry
+
+            self._entries = entries
+            self._save_cache()
+            return entry
+
     def search(
         self,
         query: str,
@@ -135,19 +302,35 @@ class ContactIndexer:
             return self.get_entries(force_rebuild=force_rebuild)[:limit]
 
         entries = self.get_entries(force_rebuild=force_rebuild)
-
-        def match(e: ContactIndexEntry) -> bool:
-            if q in (e.contact_id or "").lower():
-                return True
-            if q in (e.email or "").lower():
-                return True
-            if q in (e.trello_id or "").lower():
-                return True
-            if q in (e.hubspot_note_id or "").lower():
-                return True
-            return False
-
-        out = [e for e in entries if match(e)]
+        if len(q) < _SEARCH_GRAM:
+            # too short for a gram; such queries match most entries anyway -> linear scan
+            hits = (e for e in entries if q in e._lc_blob)
+            if limit > 0:
+                return list(islice(hits, limit))
+            return list(hits)[:limit]
+
+        # index built for exactly this list object (another thread may swap self._entries meanwhile)
+        _, grams, _, pos = self._search_index(entries)
+
+        # intersect the query's grams, then verify the survivors (a gram hit per
+        # position doesn't mean the whole query occurs); one gram is already exact
+        sets = []
+        for j in range(len(q) - _SEARCH_GRAM + 1):
+            hit = grams.get(q[j:j + _SEARCH_GRAM])
+            if not hit:
+                return []
+            sets.append(hit)
+        sets.sort(key=len)
+        candidates = sets[0].intersection(*sets[1:])
+        exact = len(q) == _SEARCH_GRAM
+
+        # position order == entries order (most recently updated first)
+        out: List[ContactIndexEntry] = []
+        for i in sorted(pos[k] for k in candidates):
+            if exact or q in entries[i]._lc_blob:
+                out.append(entries[i])
+                if limit > 0 and len(out) >= limit:
+                    break
         return out[:limit]
 
     def find(self, job_id: str, contact_id: str) -> Optional[ContactIndexEntry]:
@@ -155,9 +338,10 @@ class ContactIndexer:
         contact_id = (contact_id or "").strip()
         if not job_id or not contact_id:
             return None
-        for e in self.get_entries():
-            if e.job_id == job_id and e.contact_id == contact_id:
-                return e
+        self.get_entries()
+        e = self._entries_by_key.get((job_id, contact_id))
+        if e is not None:
+            return e
         # fallback: build directly if exists
         cdir = os.path.join(self.jobs_base_dir, job_id, "contacts", contact_id)
         if os.path.isdir(cdir):
@@ -166,32 +350,116 @@ class ContactIndexer:
 
     # -------- internals --------
 
-    def _build_entry(self, job_id: str, contact_id: str, contact_dir: str) -> ContactIndexEntry:
+    def _search_index(self, entries: List[ContactIndexEntry]) -> _SearchState:
+        """
+        n-gram -> (job_id, contact_id) keys over the lowercased search fields of `entries`.
+        Keys are the _SEARCH_GRAM-long substrings of each field; shorter queries scan.
+
+        Updated incrementally from the previous state: only entries that were added,
+        removed or replaced (rebuild reuses unchanged entry objects) touch the grams.
+        Touched gram sets are copied, never mutated, so a published state stays valid
+        for readers that still hold it.
+        """
+        state = self._search_state
+        if state is not None and state[0] is entries:
+            return state
+
+        with self._lock:
+            state = self._search_state
+            if state is not None and state[0] is entries:
+                return state
+
+            by_key: Dict[Tuple[str, str], ContactIndexEntry] = {}
+            pos: Dict[Tuple[str, str], int] = {}
+            for i, e in enumerate(entries):
+                k = (e.job_id, e.contact_id)
+                by_key[k] = e
+                pos[k] = i
+
+            grams: Dict[str, set[Tuple[str, str]]]
+            if state is None:
+                grams = self._full_grams(by_key)
+            else:
+                old_by_key = state[2]
+                removed = [(k, e) for k, e in old_by_key.items() if by_key.get(k) is not e]
+                added = [(k, e) for k, e in by_key.items() if old_by_key.get(k) is not e]
+                if (len(removed) + len(added)) * 4 > len(by_key):
+                    grams = self._full_grams(by_key)
+                else:
+                    grams = dict(state[1])
+                    touched: Dict[str, set[Tuple[str, str]]] = {}
+                    for changes, add in ((removed, False), (added, True)):
+                        for k, e in changes:
+                            for g in _entry_grams(e):
+                                t = touched.get(g)
+                                if t is None:
+                                    t = touched[g] = set(grams.get(g, ()))
+                                if add:
+                                    t.add(k)
+                                else:
+                                    t.discard(k)
+                    for g, t in touched.items():
+                        if t:
+                            grams[g] = t
+                        else:
+                            grams.pop(g, None)
+
+            new_state: _SearchState = (entries, grams, by_key, pos)
+            # don't let a reader holding an older list roll the shared state back
+            if entries is self._entries:
+                self._search_state = new_state
+            return new_state
+
+    @staticmethod
+    def _full_grams(by_key: Dict[Tuple[str, str], ContactIndexEntry]) -> Dict[str, set[Tuple[str, str]]]:
+        grams: Dict[str, set[Tuple[str, str]]] = defaultdict(set)
+        for k, e in by_key.items():
+            for g in _entry_grams(e):
+                grams[g].add(k)
+        return dict(grams)
+
+    def _build_or_reuse(self, key: Tuple[str, str], contact_dir: str) -> Tuple[ContactIndexEntry, Tuple[int, int]]:
+        """
+        Return the previous entry if the folder is unchanged since the last build.
+        The dir mtime catches added/removed files; the latest artifact mtime
+        catches files rewritten in place (which leave the dir mtime alone).
+        """
+        scan = self._scan_contact_dir(contact_dir)
+        try:
+            sig = (os.stat(contact_dir).st_mtime_ns, scan[2])
+        except OSError:
+            sig = (0, scan[2])
+
+        prev = self._entries_by_key.get(key)
+        if prev is not None and self._dir_mtime.get(contact_dir) == sig:
+            return prev, sig
+        return self._build_entry(key[0], key[1], contact_dir, scan=scan), sig
+
+    def _build_entry(
+        self,
+        job_id: str,
+        contact_id: str,
+        contact_dir: str,
+        scan: Optional[Tuple[frozenset[str], Dict[str, int], int]] = None,
+    ) -> ContactIndexEntry:
         entry = ContactIndexEntry(job_id=job_id, contact_id=contact_id, contact_dir=contact_dir)
 
+        # single directory pass: file names (existence checks become set lookups), sizes, mtimes
+        names, sizes, latest_mtime = scan or self._scan_contact_dir(contact_dir)
+
         # meta.json contains email + hubspot_contact_id
-        meta = self._read_json(os.path.join(contact_dir, "meta.json")) or {}
+        meta = self._read_artifact(contact_dir, sizes, "meta.json", keys=("email",)) or {}
         entry.email = (meta.get("email") or "").strip()
 
-        # Step1 match: status + trello_ids or trello_id
-        step1_match = self._read_json(os.path.join(contact_dir, "step1_match.json")) or {}
-        if step1_match:
-            entry.has_step1 = True
-            status = (step1_match.get("status") or "").strip()
-            if status:
-                entry.status = status if status in ("duplicate", "no_match") else entry.status
-
-            trello_ids = step1_match.get("trello_ids")
-            if isinstance(trello_ids, list) and trello_ids:
-                # if single -> trello_id
-                if len(trello_ids) == 1:
-                    entry.trello_id = str(trello_ids[0]).strip()
+        # Step1 match: status + trello_ids (status/step are decided below, after the write check)
+        step1_match = self._read_artifact(contact_dir, sizes, "step1_match.json", keys=("status", "trello_ids"))
+        entry.has_step1, entry.trello_id, step1_status = _classify_step1(step1_match)
 
         # If step1 match didn't include it, try from JOB_STORE style field written later:
         # The pipeline writes current state into JOB_STORE, but not persisted.
         # We can infer trello_id from existence of step1_trello.json by reading card.url:
         if not entry.trello_id:
-            trello_bundle = self._read_json(os.path.join(contact_dir, "step1_trello.json"))
+            trello_bundle = self._read_artifact(contact_dir, sizes, "step1_trello.json")
             if isinstance(trello_bundle, dict):
                 entry.has_step1 = True
                 card = trello_bundle.get("card") if isinstance(trello_bundle.get("card"), dict) else {}
@@ -205,24 +473,24 @@ class ContactIndexer:
                         pass
 
         # Step2 hubspot
-        if os.path.exists(os.path.join(contact_dir, "step2_hubspot.json")) or os.path.exists(os.path.join(contact_dir, "step2_merged_context.txt")):
+        if "step2_hubspot.json" in names or "step2_merged_context.txt" in names:
             entry.has_step2 = True
 
         # Step3 ai json
-        if os.path.exists(os.path.join(contact_dir, "step3_ai.json")):
+        if "step3_ai.json" in names:
             entry.has_step3 = True
 
         # Step4 html note
-        if os.path.exists(os.path.join(contact_dir, "step4_note.html")):
+        if "step4_note.html" in names:
             entry.has_step4 = True
 
         # Verified
-        ver = self._read_json(os.path.join(contact_dir, "verified.json")) or {}
+        ver = self._read_artifact(contact_dir, sizes, "verified.json", keys=("verified",)) or {}
         if isinstance(ver, dict):
             entry.verified = bool(ver.get("verified", False))
 
         # HubSpot write result
-        wr = self._read_json(os.path.join(contact_dir, "hubspot_write_result.json")) or {}
+        wr = self._read_artifact(contact_dir, sizes, "hubspot_write_result.json", keys=("note_id",)) or {}
         if isinstance(wr, dict) and wr.get("note_id"):
             entry.pushed_to_hubspot = True
             entry.hubspot_note_id = str(wr.get("note_id")).strip()
@@ -230,19 +498,20 @@ class ContactIndexer:
             entry.status = "done"
         else:
             # If not pushed, infer step/status
-            entry.step, entry.status = self._infer_step_status(entry, step1_match)
+            entry.step, entry.status = self._infer_step_status(entry, step1_status)
 
-        # updated_ts: latest mtime of known artifacts
-        entry.updated_ts = self._compute_updated_ts(contact_dir)
+        # updated_ts: latest mtime of known artifacts (from the same scan)
+        entry.updated_ts = latest_mtime
+
+        _set_search_blob(entry)
 
         return entry
 
-    def _infer_step_status(self, entry: ContactIndexEntry, step1_match: dict[str, Any]) -> Tuple[str, str]:
+    def _infer_step_status(self, entry: ContactIndexEntry, step1_status: str) -> Tuple[str, str]:
         # Explicit duplicate / no_match
-        s = (step1_match.get("status") or "").strip()
-        if s == "duplicate":
+        if step1_status == "duplicate":
             return "step1", "duplicate"
-        if s == "no_match":
+        if step1_status == "no_match":
             return "step1", "error"
 
         # If step4 exists, it's "done"
@@ -256,27 +525,106 @@ class ContactIndexer:
             return "step1", "running"
         return "unknown", "unknown"
 
-    def _compute_updated_ts(self, contact_dir: str) -> float:
-        latest = 0.0
+    def _scan_contact_dir(self, contact_dir: str) -> Tuple[frozenset[str], Dict[str, int], int]:
+        """
+        One os.scandir pass over a contact folder.
+        Returns (names, size_by_name, latest_mtime); size is -1 if the stat failed.
+        """
+        size_by_name: Dict[str, int] = {}
+        latest = 0
         try:
-            for name in os.listdir(contact_dir):
-                path = os.path.join(contact_dir, name)
-                try:
-                    mt = os.path.getmtime(path)
-                    if mt > latest:
-                        latest = mt
-                except Exception:
-                    continue
+            with os.scandir(contact_dir) as it:
+                for e in it:
+                    try:
+                        st = e.stat()
+                    except OSError:
+                        size_by_name[e.name] = -1
+                        continue
+                    size_by_name[e.name] = st.st_size
+                    if st.st_mtime_ns > latest:
+                        latest = st.st_mtime_ns
+        except OSError:
+            return frozenset(), {}, 0
+        return frozenset(size_by_name), size_by_name, latest
+
+    def _list_subdirs(self, path: str) -> List[os.DirEntry]:
+        try:
+            with os.scandir(path) as it:
+                dirs = [e for e in it if e.is_dir()]
+        except OSError:
+            return []
+        dirs.sort(key=lambda e: e.name)
+        return dirs
+
+    def _read_artifact(
+        self,
+        contact_dir: str,
+        sizes: Dict[str, int],
+        name: str,
+        keys: Optional[Tuple[str, ...]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        # skip the open() entirely for files the directory listing doesn't have
+        size = sizes.get(name)
+        if size is None:
+            return None
+        path = os.path.join(contact_dir, name)
+        if keys is None:
+            return self._read_json(path)
+        return self._read_json_fields(path, keys, size=size)
+
+    def _read_json_fields(self, path: str, keys: Tuple[str, ...], size: int = -1) -> Optional[Dict[str, Any]]:
+        """
+        Top-level object with only `keys` materialized; other values are skipped
+        (present as None, so truthiness/`in` behave like the full dict).
+        Stops reading once every key was found.
+        Small files (or no ijson) -> plain full load. Pass `size` from a directory scan
+        to avoid another stat.
+        """
+        if size < 0:
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                return None
+        if ijson is None or size < _STREAM_PARSE_MIN_BYTES:
+            return self._read_json(path)
+
+        try:
+            with open(path, "rb") as f:
+                events = ijson.basic_parse(f, use_float=True)
+                first, _ = next(events)
+                if first != "start_map":
+                    return None
+
+                wanted = set(keys)
+                out: Dict[str, Any] = {}
+                for event, value in events:
+                    if event == "end_map":
+                        break
+                    key = value  # event == "map_key" at the top level
+                    builder = ijson.ObjectBuilder() if key in wanted else None
+                    depth = 0
+                    for event, value in events:
+                        if builder is not None:
+                            builder.event(event, value)
+                        if event in ("start_map", "start_array"):
+                            depth += 1
+                        elif event in ("end_map", "end_array"):
+                            depth -= 1
+                        if depth == 0:
+                            break
+                    out[key] = builder.value if builder is not None else None
+                    if builder is not None:
+                        wanted.discard(key)
+                        if not wanted:
+                            break
+                return out
         except Exception:
-            return 0.0
-        return latest
+            # unexpected structure / truncated file -> same result as a full load
+            return self._read_json(path)
 
     def _read_json(self, path: str) -> Optional[Dict[str, Any]]:
-        if not os.path.exists(path):
-            return None
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            data = read_json_file(path)
             return data if isinstance(data, dict) else None
         except Exception:
             return None
@@ -286,28 +634,37 @@ class ContactIndexer:
     def _save_cache(self) -> None:
         try:
             payload = {
-                "built_ts": self._last_built_ts,
+                "built_ts_ns": self._last_built_ns,
                 "jobs_base_dir": self.jobs_base_dir,
-                "entries": [asdict(e) for e in self._entries],
+                "entries": [{k: getattr(e, k) for k in _FIELD_NAMES} for e in self._entries],
             }
-            with open(self.cache_path, "w", encoding="utf-8") as f:
-                json.dump(payload, f, ensure_ascii=False, indent=2)
+            data = dumps_bytes(payload, indent=True)
         except Exception:
             # cache is optional; ignore failures
-            pass
+            return
+
+        # write next to the target, then swap in: readers never see a half-written cache
+        tmp = f"{self.cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self.cache_path)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
 
     def _load_cache_if_fresh(self) -> bool:
-        if not os.path.exists(self.cache_path):
-            return False
         try:
-            with open(self.cache_path, "r", encoding="utf-8") as f:
-                payload = json.load(f)
-            built_ts = float(payload.get("built_ts", 0.0))
-            if not built_ts:
+            payload = read_json_file(self.cache_path)
+            # older caches (float "built_ts" seconds) lack this key -> rebuilt once
+            built_ns = int(payload.get("built_ts_ns", 0))
+            if not built_ns:
                 return False
 
             # if cache too old, ignore
-            if (time.time() - built_ts) > self.cache_ttl_seconds:
+            if (time.time_ns() - built_ns) > self.cache_ttl_seconds * 1_000_000_000:
                 return False
 
             raw_entries = payload.get("entries", [])
@@ -318,10 +675,14 @@ class ContactIndexer:
             for r in raw_entries:
                 if not isinstance(r, dict):
                     continue
-                entries.append(ContactIndexEntry(**r))
+                # ignore keys from older/newer cache layouts
+                e = ContactIndexEntry(**{k: v for k, v in r.items() if k in _FIELD_NAMES})
+                _set_search_blob(e)
+                entries.append(e)
 
             self._entries = entries
-            self._last_built_ts = built_ts
+            self._entries_by_key = {(e.job_id, e.contact_id): e for e in entries}
+            self._last_built_ns = built_ns
             return True
         except Exception:
             return False
@@ -3,12 +3,14 @@ from __future__ import annotations
 
 import json
 import os
+import threading
 import time
-from typing import Any, Dict
+from collections import OrderedDict
+from typing import Iterable, Iterator, List, Tuple
 
-from flask import Blueprint, render_template_string, redirect, url_for, request
+from flask import Blueprint, Response, redirect, stream_template, url_for, request
 
-from ui.templates import BASE_LAYOUT
+from ui.templates import page_template
 from ui.indexer import INDEXER, ContactIndexEntry
 from step3_openai_assistant import rerun_step3_from_local_context
 from step4_render_hubspot_html import rerun_step4_from_local_ai
@@ -17,39 +19,86 @@ from hubspot_write import push_verified_note_to_hubspot
 
 bp_contact = Blueprint("contact", __name__)
 
+# read / send size for streamed artifacts
+_CHUNK = 64 * 1024
+
+# contact dir -> (dir mtime_ns, file names); answers "file missing" without touching the disk again.
+# Creating/deleting a file bumps the dir mtime, which invalidates the entry.
+_NAMES_CACHE: "OrderedDict[str, Tuple[int, frozenset[str]]]" = OrderedDict()
+_NAMES_CACHE_MAX = 2048
+_NAMES_LOCK = threading.Lock()
+
 
 # ----------------------------
 # Helpers
 # ----------------------------
 
-def _read_text(path: str) -> str:
-    if not os.path.exists(path):
-        return ""
+def _list_names(path: str) -> frozenset[str]:
+    # one directory listing instead of an exists() stat per artifact; reused while the dir mtime is unchanged
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            return f.read()
-    except Exception:
-        return ""
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return frozenset()
 
+    with _NAMES_LOCK:
+        hit = _NAMES_CACHE.get(path)
+        if hit is not None and hit[0] == mtime:
+            _NAMES_CACHE.move_to_end(path)
+            return hit[1]
 
-def _read_json(path: str) -> Dict[str, Any]:
-    if not os.path.exists(path):
-        return {}
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return {}
+        with os.scandir(path) as it:
+            names = frozenset(e.name for e in it)
+    except OSError:
+        return frozenset()
+
+    # a dir modified within the last second may change again without a new mtime (coarse fs clocks)
+    if time.time_ns() - mtime > 1_000_000_000:
+        with _NAMES_LOCK:
+            _NAMES_CACHE[path] = (mtime, names)
+            _NAMES_CACHE.move_to_end(path)
+            if len(_NAMES_CACHE) > _NAMES_CACHE_MAX:
+                _NAMES_CACHE.popitem(last=False)
+    return names
+
+
+def _has_content(cdir: str, names: frozenset[str], name: str) -> bool:
+    if name not in names:
+        return False
+    try:
+        return os.path.getsize(os.path.join(cdir, name)) > 0
+    except OSError:
+        return False
 
 
-def _layout(content: str, title: str = "") -> str:
-    html = BASE_LAYOUT
-    html = html.replace("{{ title or \"Ex-Kunden Analyse\" }}", title)
-    html = html.replace("{{ content | safe }}", content)
-    html = html.replace("{{ 'active' if nav=='upload' else '' }}", "")
-    html = html.replace("{{ 'active' if nav=='search' else '' }}", "active")
-    html = html.replace("{{ nav }}", "search")
-    return html
+def _iter_text(cdir: str, names: frozenset[str], name: str) -> Iterator[str]:
+    # yields the file in _CHUNK pieces, so large artifacts never sit in memory as one string
+    if name not in names:
+        return
+    try:
+        with open(os.path.join(cdir, name), "r", encoding="utf-8", errors="replace") as f:
+            while True:
+                chunk = f.read(_CHUNK)
+                if not chunk:
+                    return
+                yield chunk
+    except OSError:
+        return
+
+
+def _coalesce(pieces: Iterable[str], size: int = _CHUNK) -> Iterator[str]:
+    # Jinja streams many tiny strings; group them into ~size writes
+    buf: List[str] = []
+    n = 0
+    for piece in pieces:
+        buf.append(piece)
+        n += len(piece)
+        if n >= size:
+            yield "".join(buf)
+            buf = []
+            n = 0
+    if buf:
+        yield "".join(buf)
 
 
 # ----------------------------
@@ -90,13 +139,13 @@ CONTACT_PAGE = """
     <h3>Input (Trello + HubSpot)</h3>
 
     <h4>Trello</h4>
-    <pre>{{ trello_text }}</pre>
+    <pre>{% for chunk in trello_text %}{{ chunk }}{% endfor %}</pre>
 
     <h4>HubSpot</h4>
-    <pre>{{ hubspot_text }}</pre>
+    <pre>{% for chunk in hubspot_text %}{{ chunk }}{% endfor %}</pre>
 
     <h4>Merged Context (Step2)</h4>
-    <pre>{{ merged_context }}</pre>
+    <pre>{% for chunk in merged_context %}{{ chunk }}{% endfor %}</pre>
   </div>
 
   <!-- OUTPUT -->
@@ -114,11 +163,11 @@ CONTACT_PAGE = """
     </div>
 
     <h4>AI JSON (Step3)</h4>
-    <pre>{{ step3_json }}</pre>
+    <pre>{% for chunk in step3_json %}{{ chunk }}{% endfor %}</pre>
 
     <h4>HTML Vorschau (Step4)</h4>
-    {% if step4_html %}
-      <iframe srcdoc="{{ step4_html|e }}"></iframe>
+    {% if has_step4_html %}
+      <iframe src="{{ url_for('job.contact_file', job_id=entry.job_id, contact_id=entry.contact_id, filename='step4_note.html') }}"></iframe>
     {% else %}
       <div class="muted">Kein HTML vorhanden.</div>
     {% endif %}
@@ -139,24 +188,29 @@ def contact_detail(job_id: str, contact_id: str):
         return "Kontakt nicht gefunden", 404
 
     cdir = entry.contact_dir
+    names = _list_names(cdir)
+
+    # text artifacts are passed as chunk iterators and read while the page streams out
+    trello_text = _iter_text(cdir, names, "step1_trello_text.txt")
+    hubspot_text = _iter_text(cdir, names, "step2_hubspot_text.txt")
+    merged_context = _iter_text(cdir, names, "step2_merged_context.txt")
+    # shown as written by the pipeline (already indent=2), no parse + re-dump per view
+    step3_json = _iter_text(cdir, names, "step3_ai.json")
 
-    trello_text = _read_text(os.path.join(cdir, "step1_trello_text.txt"))
-    hubspot_text = _read_text(os.path.join(cdir, "step2_hubspot_text.txt"))
-    merged_context = _read_text(os.path.join(cdir, "step2_merged_context.txt"))
-    step3_json = json.dumps(_read_json(os.path.join(cdir, "step3_ai.json")), ensure_ascii=False, indent=2)
-    step4_html = _read_text(os.path.join(cdir, "step4_note.html"))
+    # the note itself is loaded by the iframe from /contact-file (sent as a file, not escaped into the page)
+    has_step4_html = _has_content(cdir, names, "step4_note.html")
 
-    page = _layout(CONTACT_PAGE, title="Kontakt · Analyse")
+    page = page_template(CONTACT_PAGE, title="Kontakt · Analyse", nav="search")
 
-    return render_template_string(
+    return Response(_coalesce(stream_template(
         page,
         entry=entry,
         trello_text=trello_text,
         hubspot_text=hubspot_text,
         merged_context=merged_context,
         step3_json=step3_json,
-        step4_html=step4_html,
-    )
+        has_step4_html=has_step4_html,
+    )), mimetype="text/html")
 
 
 @bp_contact.post("/contact/<job_id>/<contact_id>/rerun-step3")
@@ -166,7 +220,7 @@ def rerun_step3(job_id: str, contact_id: str):
         return "Kontakt nicht gefunden", 404
 
     rerun_step3_from_local_context(entry.contact_dir)
-    INDEXER.rebuild()
+    INDEXER.update_one(job_id, contact_id)
     return redirect(url_for("contact.contact_detail", job_id=job_id, contact_id=contact_id))
 
 
@@ -177,7 +231,7 @@ def rerun_step4(job_id: str, contact_id: str):
         return "Kontakt nicht gefunden", 404
 
     rerun_step4_from_local_ai(entry.contact_dir)
-    INDEXER.rebuild()
+    INDEXER.update_one(job_id, contact_id)
     return redirect(url_for("contact.contact_detail", job_id=job_id, contact_id=contact_id))
 
 
@@ -191,7 +245,7 @@ def verify_contact(job_id: str, contact_id: str):
     with open(path, "w", encoding="utf-8") as f:
         json.dump({"verified": True, "ts": int(time.time())}, f)
 
-    INDEXER.rebuild()
+    INDEXER.update_one(job_id, contact_id)
     return redirect(url_for("contact.contact_detail", job_id=job_id, contact_id=contact_id))
 
 
@@ -202,5 +256,5 @@ def push_to_hubspot(job_id: str, contact_id: str):
         return "Kontakt nicht gefunden", 404
 
     push_verified_note_to_hubspot(entry.contact_dir)
-    INDEXER.rebuild()
+    INDEXER.update_one(job_id, contact_id)
     return redirect(url_for("contact.contact_detail", job_id=job_id, contact_id=contact_id))
@@ -0,0 +1,23 @@
+# ui/routes_core.py
+from __future__ import annotations
+
+from flask import Blueprint, Response, request
+
+from ui.templates import APP_CSS, APP_CSS_VERSION
+
+
+bp_core = Blueprint("core", __name__)
+
+_APP_CSS_BYTES = APP_CSS.encode("utf-8")
+
+
+@bp_core.get("/static/app.css")
+def app_css():
+    """
+    Shared stylesheet for BASE_LAYOUT.
+    The layout links it with ?v=<content hash>, so it can be cached as immutable.
+    """
+    resp = Response(_APP_CSS_BYTES, mimetype="text/css")
+    resp.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    resp.set_etag(APP_CSS_VERSION)
+    return resp.make_conditional(request)
@@ -5,9 +5,10 @@ import json
 import os
 from typing import Any, Dict, List
 
-from flask import Blueprint, Response, abort, redirect, render_template_string, request, send_from_directory, url_for
+from flask import Blueprint, Response, abort, redirect, render_template, request, send_from_directory, url_for
+from markupsafe import Markup, escape
 
-from ui.templates import BASE_LAYOUT
+from ui.templates import STATUS_CLASS, STATUS_SPAN, code_or_dash, page_template
 from jobs import JOB_STORE
 from pipeline_job_runner import set_verified, push_verified_to_hubspot
 from config import load_config
@@ -25,7 +26,8 @@ DASHBOARD_HTML = """
   <div class="row">
     <div>
       <h2 style="margin:0;">Job Dashboard</h2>
-      <div class="muted">Job: <code id="jobId">{{ job_id }}</code> · Status: <code id="jobStatus">{{ status }}</code></div>
+      <div class="muted">Job: <code id="jobId">{{ job_id }}</code> · Status: <code id="jobStatus" class="{{ status_class }}">{{ status }}</code></div>
+      <div id="jobError" class="status-error"{% if not error %} hidden{% endif %}>{{ error }}</div>
     </div>
     <div class="spacer"></div>
     <a class="btn" href="/review/{{ job_id }}">Review & Verify</a>
@@ -69,31 +71,14 @@ DASHBOARD_HTML = """
       </tr>
     </thead>
     <tbody id="tbody">
-      {% for cid, c in contacts.items() %}
-        <tr id="row-{{ cid }}">
-          <td>{% if c.email %}<code>{{ c.email }}</code>{% else %}<span class="muted">—</span>{% endif %}</td>
-          <td><code>{{ cid }}</code></td>
-          <td>{% if c.trello_id %}<code>{{ c.trello_id }}</code>{% else %}<span class="muted">—</span>{% endif %}</td>
-
-          <td>
-            {% if c.status=='done' %}<span class="status-ok">done</span>
-            {% elif c.status=='duplicate' %}<span class="status-warn">duplicate</span>
-            {% elif c.status=='error' %}<span class="status-error">error</span>
-            {% else %}<span class="muted">{{ c.status }}</span>{% endif %}
-          </td>
-
-          <td><code>{{ c.step }}</code></td>
-          <td>{{ c.last_message }}</td>
-          <td>{{ "✅" if c.verified else "—" }}</td>
-          <td><a class="btn" href="/contact/{{ job_id }}/{{ cid }}">Öffnen</a></td>
-        </tr>
-      {% endfor %}
+      {{ rows_html }}
     </tbody>
   </table>
 </div>
 
 <script>
   const jobId = "{{ job_id }}";
+  const STATUS_CLASS = {{ status_classes|tojson }};
   const es = new EventSource(`/events/${jobId}`);
 
   function upsertRow(c) {
@@ -101,7 +86,7 @@ DASHBOARD_HTML = """
     const rowId = `row-${cid}`;
     let tr = document.getElementById(rowId);
 
-    const statusClass = (c.status === "done") ? "status-ok" : (c.status === "error") ? "status-error" : (c.status === "duplicate") ? "status-warn" : "muted";
+    const statusClass = STATUS_CLASS[c.status] || "muted";
     const verifiedTxt = c.verified ? "✅" : "—";
 
     const emailCell = c.email ? `<code>${c.email}</code>` : `<span class="muted">—</span>`;
@@ -133,7 +118,14 @@ DASHBOARD_HTML = """
       const ev = JSON.parse(e.data);
 
       if (ev.type === "job_status") {
-        document.getElementById("jobStatus").textContent = ev.status;
+        const js = document.getElementById("jobStatus");
+        js.textContent = ev.status;
+        js.className = STATUS_CLASS[ev.status] || "";
+        const je = document.getElementById("jobError");
+        je.textContent = ev.error || "";
+        je.hidden = !ev.error;
+        // server ends the stream here; don't let EventSource reconnect
+        if (ev.status === "done" || ev.status === "error") es.close();
       }
       if (ev.type === "progress") {
         const p = ev.progress || {};
@@ -176,31 +168,57 @@ REVIEW_HTML = """
       </tr>
     </thead>
     <tbody>
-      {% for r in rows %}
-        <tr>
-          <td>{% if r.email %}<code>{{ r.email }}</code>{% else %}<span class="muted">—</span>{% endif %}</td>
-          <td><code>{{ r.contact_id }}</code></td>
-          <td>
-            <form method="post" action="/verify/{{ job_id }}/{{ r.contact_id }}">
-              <input type="hidden" name="verified" value="{{ '0' if r.verified else '1' }}">
-              {% if r.verified %}
-                <button class="btn ok" type="submit">✅</button>
-              {% else %}
-                <button class="btn primary" type="submit">Verify</button>
-              {% endif %}
-            </form>
-          </td>
-          <td><a class="btn" href="/contact/{{ job_id }}/{{ r.contact_id }}">Öffnen</a></td>
-        </tr>
-      {% endfor %}
-      {% if rows|length == 0 %}
-        <tr><td colspan="4" class="muted">Keine Einträge.</td></tr>
-      {% endif %}
+      {{ rows_html }}
     </tbody>
   </table>
 </div>
 """
 
+
+def _render_dashboard_rows(job_id: str, contacts: Dict[str, Any]) -> Markup:
+    jid = escape(job_id)
+    out: List[str] = []
+    for cid, c in contacts.items():
+        cid_e = escape(cid)
+        status = c.get("status", "")
+        status_html = STATUS_SPAN.get(status) or f'<span class="muted">{escape(status)}</span>'
+        out.append(
+            f'<tr id="row-{cid_e}">'
+            f"<td>{code_or_dash(c.get('email'))}</td>"
+            f"<td><code>{cid_e}</code></td>"
+            f"<td>{code_or_dash(c.get('trello_id'))}</td>"
+            f"<td>{status_html}</td>"
+            f"<td><code>{escape(c.get('step', ''))}</code></td>"
+            f"<td>{escape(c.get('last_message', ''))}</td>"
+            f"<td>{'✅' if c.get('verified') else '—'}</td>"
+            f'<td><a class="btn" href="/contact/{jid}/{cid_e}">Öffnen</a></td>'
+            "</tr>\n"
+        )
+    return Markup("".join(out))
+
+
+def _render_review_rows(job_id: str, rows: List[Dict[str, Any]]) -> Markup:
+    if not rows:
+        return Markup('<tr><td colspan="4" class="muted">Keine Einträge.</td></tr>')
+    jid = escape(job_id)
+    out: List[str] = []
+    for r in rows:
+        cid_e = escape(r["contact_id"])
+        if r["verified"]:
+            verify_form = '<input type="hidden" name="verified" value="0"><button class="btn ok" type="submit">✅</button>'
+        else:
+            verify_form = '<input type="hidden" name="verified" value="1"><button class="btn primary" type="submit">Verify</button>'
+        out.append(
+            "<tr>"
+            f"<td>{code_or_dash(r['email'])}</td>"
+            f"<td><code>{cid_e}</code></td>"
+            f'<td><form method="post" action="/verify/{jid}/{cid_e}">{verify_form}</form></td>'
+            f'<td><a class="btn" href="/contact/{jid}/{cid_e}">Öffnen</a></td>'
+            "</tr>\n"
+        )
+    return Markup("".join(out))
+
+
 PUSH_RESULT_HTML = """
 <div class="card">
   <div class="row">
@@ -223,16 +241,6 @@ PUSH_RESULT_HTML = """
 """
 
 
-def _layout(content: str, title: str) -> str:
-    html = BASE_LAYOUT
-    html = html.replace("{{ title or \"Ex-Kunden Analyse\" }}", title)
-    html = html.replace("{{ content | safe }}", content)
-    html = html.replace("{{ 'active' if nav=='upload' else '' }}", "")
-    html = html.replace("{{ 'active' if nav=='search' else '' }}", "active")
-    html = html.replace("{{ nav }}", "search")
-    return html
-
-
 # ----------------------------
 # Routes
 # ----------------------------
@@ -240,13 +248,16 @@ def _layout(content: str, title: str) -> str:
 @bp_job.get("/dashboard/<job_id>")
 def dashboard(job_id: str):
     snap = JOB_STORE.get_snapshot(job_id)
-    page = _layout(DASHBOARD_HTML, title="Dashboard · Ex-Kunden Analyse")
-    return render_template_string(
+    page = page_template(DASHBOARD_HTML, title="Dashboard · Ex-Kunden Analyse", nav="search")
+    return render_template(
         page,
         job_id=job_id,
         status=snap.get("status", "unknown"),
+        status_class=STATUS_CLASS.get(snap.get("status", ""), ""),
+        status_classes=STATUS_CLASS,
+        error=snap.get("error", ""),
         progress=snap.get("progress", {}),
-        contacts=snap.get("contacts", {}),
+        rows_html=_render_dashboard_rows(job_id, snap.get("contacts", {})),
     )
 
 
@@ -274,8 +285,8 @@ def review(job_id: str):
             continue
         rows.append({"contact_id": cid, "email": c.get("email", ""), "verified": bool(c.get("verified"))})
 
-    page = _layout(REVIEW_HTML, title="Review · Ex-Kunden Analyse")
-    return render_template_string(page, job_id=job_id, rows=rows)
+    page = page_template(REVIEW_HTML, title="Review · Ex-Kunden Analyse", nav="search")
+    return render_template(page, job_id=job_id, rows_html=_render_review_rows(job_id, rows))
 
 
 @bp_job.post("/verify/<job_id>/<contact_id>")
@@ -290,8 +301,8 @@ def push_to_hubspot(job_id: str):
     _app_cfg, _trello_cfg, hs_cfg, _oa_cfg = load_config()
     res = push_verified_to_hubspot(job_id, hs_cfg, also_associate_deals=True)
 
-    page = _layout(PUSH_RESULT_HTML, title="HubSpot Push · Ex-Kunden Analyse")
-    return render_template_string(
+    page = page_template(PUSH_RESULT_HTML, title="HubSpot Push · Ex-Kunden Analyse", nav="search")
+    return render_template(
         page,
         job_id=job_id,
         created=res.get("created", 0),
@@ -300,15 +311,29 @@ def push_to_hubspot(job_id: str):
     )
 
 
+def _is_plain_segment(value: str) -> bool:
+    return bool(value) and value not in (".", "..") and not any(ch in value for ch in "/\\\0")
+
+
 @bp_job.get("/contact-file/<job_id>/<contact_id>/<path:filename>")
 def contact_file(job_id: str, contact_id: str, filename: str):
     """
     Optional helper endpoint to serve raw artifacts.
     Useful if you want to open step4_note.html directly or download json/txt.
     """
-    snap = JOB_STORE.get_snapshot(job_id)
-    job_dir = snap.get("job_dir", "")
-    cdir = os.path.join(job_dir, "contacts", str(contact_id))
+    # ids come straight from the URL: only a single plain path segment is allowed
+    if not (_is_plain_segment(job_id) and _is_plain_segment(contact_id)):
+        abort(404)
+    # jobs from earlier runs are only on disk (the contact page links here for every indexed job)
+    if job_id in JOB_STORE.jobs:
+        job_dir = JOB_STORE.get_snapshot(job_id).get("job_dir", "")
+    else:
+        job_dir = os.path.join(JOB_STORE.base_dir, job_id)
+    # absolute: flask resolves relative directories against the app root (ui/), not the cwd
+    cdir = os.path.realpath(os.path.join(job_dir, "contacts", contact_id))
+    base = os.path.realpath(JOB_STORE.base_dir)
+    if os.path.commonpath([cdir, base]) != base:
+        abort(404)
     full = os.path.join(cdir, filename)
     if not os.path.exists(full):
         abort(404)
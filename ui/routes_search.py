@@ -3,9 +3,11 @@ from __future__ import annotations
 
 from typing import Any, List
 
-from flask import Blueprint, request, render_template_string, redirect, url_for
+from flask import Blueprint, request, render_template, redirect, url_for
 
-from ui.templates import BASE_LAYOUT
+from markupsafe import Markup, escape
+
+from ui.templates import MUTED_DASH, STATUS_SPAN, code_or_dash, page_template
 from ui.indexer import INDEXER, ContactIndexEntry
 
 
@@ -55,72 +57,44 @@ SEARCH_PAGE = """
       </tr>
     </thead>
     <tbody>
-      {% if results|length == 0 %}
-        <tr><td colspan="9" class="muted">Keine Treffer.</td></tr>
-      {% else %}
-        {% for r in results %}
-          <tr>
-            <td><code>{{ r.job_id }}</code></td>
-            <td><code>{{ r.contact_id }}</code></td>
-            <td>{% if r.email %}<code>{{ r.email }}</code>{% else %}<span class="muted">—</span>{% endif %}</td>
-            <td>{% if r.trello_id %}<code>{{ r.trello_id }}</code>{% else %}<span class="muted">—</span>{% endif %}</td>
-
-            <td>
-              {% if r.status == "done" %}
-                <span class="status-ok">done</span>
-              {% elif r.status == "duplicate" %}
-                <span class="status-warn">duplicate</span>
-              {% elif r.status == "error" %}
-                <span class="status-error">error</span>
-              {% else %}
-                <span class="muted">{{ r.status or "unknown" }}</span>
-              {% endif %}
-            </td>
-
-            <td><code>{{ r.step or "unknown" }}</code></td>
-
-            <td>
-              {% if r.verified %}
-                <span class="status-ok">✅</span>
-              {% else %}
-                <span class="muted">—</span>
-              {% endif %}
-            </td>
-
-            <td>
-              {% if r.pushed_to_hubspot %}
-                <span class="status-ok">✅</span>
-                {% if r.hubspot_note_id %}
-                  <div class="muted">note_id: <code>{{ r.hubspot_note_id }}</code></div>
-                {% endif %}
-              {% else %}
-                <span class="muted">—</span>
-              {% endif %}
-            </td>
-
-            <td>
-              <a class="btn" href="/contact/{{ r.job_id }}/{{ r.contact_id }}">Öffnen</a>
-            </td>
-          </tr>
-        {% endfor %}
-      {% endif %}
+      {{ rows_html }}
     </tbody>
   </table>
 </div>
 """
 
 
-def _layout(content: str, title: str, nav: str) -> str:
-    """
-    Uses BASE_LAYOUT (keeps dependencies minimal, no extra template engine needed).
-    """
-    html = BASE_LAYOUT
-    html = html.replace("{{ title or \"Ex-Kunden Analyse\" }}", title)
-    html = html.replace("{{ content | safe }}", content)
-    html = html.replace("{{ 'active' if nav=='upload' else '' }}", "active" if nav == "upload" else "")
-    html = html.replace("{{ 'active' if nav=='search' else '' }}", "active" if nav == "search" else "")
-    html = html.replace("{{ nav }}", nav)
-    return html
+_CHECK = '<span class="status-ok">✅</span>'
+
+
+def _render_result_rows(results: List[ContactIndexEntry]) -> Markup:
+    if not results:
+        return Markup('<tr><td colspan="9" class="muted">Keine Treffer.</td></tr>')
+    out: List[str] = []
+    for r in results:
+        jid = escape(r.job_id)
+        cid = escape(r.contact_id)
+        status_html = STATUS_SPAN.get(r.status) or f'<span class="muted">{escape(r.status or "unknown")}</span>'
+        if r.pushed_to_hubspot:
+            note_html = _CHECK
+            if r.hubspot_note_id:
+                note_html += f'<div class="muted">note_id: <code>{escape(r.hubspot_note_id)}</code></div>'
+        else:
+            note_html = MUTED_DASH
+        out.append(
+            "<tr>"
+            f"<td><code>{jid}</code></td>"
+            f"<td><code>{cid}</code></td>"
+            f"<td>{code_or_dash(r.email)}</td>"
+            f"<td>{code_or_dash(r.trello_id)}</td>"
+            f"<td>{status_html}</td>"
+            f"<td><code>{escape(r.step or 'unknown')}</code></td>"
+            f"<td>{_CHECK if r.verified else MUTED_DASH}</td>"
+            f"<td>{note_html}</td>"
+            f'<td><a class="btn" href="/contact/{jid}/{cid}">Öffnen</a></td>'
+            "</tr>\n"
+        )
+    return Markup("".join(out))
 
 
 @bp_search.get("/search")
@@ -131,5 +105,5 @@ def search_page():
     # Keep it fast: only rebuild if user explicitly asks
     results: List[ContactIndexEntry] = INDEXER.search(q, limit=200, force_rebuild=rebuild)
 
-    page = _layout(SEARCH_PAGE, title="Suche · Ex-Kunden Analyse", nav="search")
-    return render_template_string(page, q=q, results=results)
+    page = page_template(SEARCH_PAGE, title="Suche · Ex-Kunden Analyse", nav="search")
+    return render_template(page, q=q, results=results, rows_html=_render_result_rows(results))
@@ -1,20 +1,26 @@
 # ui/routes_upload.py
 from __future__ import annotations
 
+import functools
 import json
 import os
+import shutil
+import queue
 import tempfile
 import threading
+import traceback
+from collections import defaultdict
 from typing import Any
 
-from flask import Blueprint, Response, request, redirect, url_for, render_template_string
+from flask import Blueprint, Response, request, redirect, url_for, render_template
+from markupsafe import Markup, escape
 
 from config import load_config
 from jobs import JOB_STORE
 from pipeline_job_runner import run_pipeline_job
 
-from utils_csv import detect_delimiter, read_csv_rows, normalize_email
-from ui.templates import BASE_LAYOUT
+from utils_csv import detect_delimiter, iter_csv_columns, read_csv_header, normalize_email
+from ui.templates import page_template
 
 
 bp_upload = Blueprint("upload", __name__)
@@ -24,7 +30,7 @@ _TMP_DIR = tempfile.mkdtemp(prefix="csv_upload_")
 
 
 # ----------------------------
-# Templates (use BASE_LAYOUT)
+# Templates (compiled via page_template)
 # ----------------------------
 
 UPLOAD_CONTENT = """
@@ -87,14 +93,14 @@ MAPPING_CONTENT = """
         <div style="margin-top:10px;">
           <label><b>E-Mail Spalte</b></label><br>
           <select name="csv1_email_col" required style="width:100%; padding:10px; border-radius:10px; border:1px solid #eee;">
-            {% for c in csv1_cols %}<option value="{{c}}">{{c}}</option>{% endfor %}
+            {{ csv1_options }}
           </select>
         </div>
 
         <div style="margin-top:10px;">
           <label><b>HubSpot Contact-ID Spalte</b></label><br>
           <select name="csv1_hubspot_id_col" required style="width:100%; padding:10px; border-radius:10px; border:1px solid #eee;">
-            {% for c in csv1_cols %}<option value="{{c}}">{{c}}</option>{% endfor %}
+            {{ csv1_options }}
           </select>
         </div>
       </div>
@@ -106,14 +112,14 @@ MAPPING_CONTENT = """
         <div style="margin-top:10px;">
           <label><b>E-Mail Spalte</b></label><br>
           <select name="csv2_email_col" required style="width:100%; padding:10px; border-radius:10px; border:1px solid #eee;">
-            {% for c in csv2_cols %}<option value="{{c}}">{{c}}</option>{% endfor %}
+            {{ csv2_options }}
           </select>
         </div>
 
         <div style="margin-top:10px;">
           <label><b>Trello-ID Spalte</b></label><br>
           <select name="csv2_trello_id_col" required style="width:100%; padding:10px; border-radius:10px; border:1px solid #eee;">
-            {% for c in csv2_cols %}<option value="{{c}}">{{c}}</option>{% endfor %}
+            {{ csv2_options }}
           </select>
         </div>
       </div>
@@ -157,17 +163,7 @@ PREVIEW_CONTENT = """
       <table>
         <thead><tr><th>E-Mail</th><th>Trello IDs</th><th>Links</th></tr></thead>
         <tbody>
-          {% if duplicates|length == 0 %}
-            <tr><td colspan="3" class="muted">Keine doppelten Trello-IDs ✅</td></tr>
-          {% else %}
-            {% for row in duplicates %}
-              <tr>
-                <td><code>{{ row.email }}</code></td>
-                <td>{% for tid in row.trello_ids %}<div><code>{{ tid }}</code></div>{% endfor %}</td>
-                <td>{% for link in row.links %}<div><a href="{{ link }}" target="_blank">{{ link }}</a></div>{% endfor %}</td>
-              </tr>
-            {% endfor %}
-          {% endif %}
+          {{ duplicates_html }}
         </tbody>
       </table>
     </div>
@@ -180,18 +176,7 @@ PREVIEW_CONTENT = """
       <table>
         <thead><tr><th>E-Mail</th><th>HubSpot Contact ID</th><th>Trello-ID</th><th>Link</th></tr></thead>
         <tbody>
-          {% if singles|length == 0 %}
-            <tr><td colspan="4" class="muted">Keine verarbeitbaren Matches.</td></tr>
-          {% else %}
-            {% for row in singles %}
-              <tr>
-                <td><code>{{ row.email }}</code></td>
-                <td><code>{{ row.hubspot_contact_id }}</code></td>
-                <td><code>{{ row.trello_id }}</code></td>
-                <td><a href="{{ row.link }}" target="_blank">{{ row.link }}</a></td>
-              </tr>
-            {% endfor %}
-          {% endif %}
+          {{ singles_html }}
         </tbody>
       </table>
     </div>
@@ -214,14 +199,54 @@ PREVIEW_CONTENT = """
 </div>
 """
 
-def _page(content: str, title: str, nav: str) -> str:
-    html = BASE_LAYOUT
-    html = html.replace("{{ title or \"Ex-Kunden Analyse\" }}", title)
-    html = html.replace("{{ content | safe }}", content)
-    html = html.replace("{{ 'active' if nav=='upload' else '' }}", "active" if nav == "upload" else "")
-    html = html.replace("{{ 'active' if nav=='search' else '' }}", "active" if nav == "search" else "")
-    html = html.replace("{{ nav }}", nav)
-    return html
+
+def _pipeline_workers() -> int:
+    try:
+        return max(1, int(os.getenv("PIPELINE_MAX_CONCURRENCY", "2")))
+    except ValueError:
+        return 2
+
+
+# Pipelines run on N worker threads instead of one raw thread per job: at most N jobs
+# hit Trello/HubSpot/OpenAI at once, the rest wait in _JOB_QUEUE as "queued".
+# Workers are daemon threads like the old per-job threads: on exit (Ctrl-C) running
+# and queued pipelines are dropped, not waited for.
+_JOB_QUEUE: "queue.Queue[tuple[str, tuple[Any, ...]]]" = queue.Queue()
+_JOB_WORKERS: list[threading.Thread] = []
+_JOB_WORKERS_LOCK = threading.Lock()
+
+
+def _pipeline_worker() -> None:
+    while True:
+        job_id, args = _JOB_QUEUE.get()
+        try:
+            run_pipeline_job(job_id, *args)
+        except Exception as e:
+            # run_pipeline_job handles per-contact errors itself; this catches what escapes it
+            traceback.print_exc()
+            JOB_STORE.set_status(job_id, "error", error=f"{type(e).__name__}: {e}")
+        finally:
+            _JOB_QUEUE.task_done()
+
+
+def _submit_pipeline_job(job_id: str, *args: Any) -> None:
+    JOB_STORE.set_status(job_id, "queued")
+    _JOB_QUEUE.put((job_id, args))
+    with _JOB_WORKERS_LOCK:
+        if not _JOB_WORKERS:
+            for i in range(_pipeline_workers()):
+                t = threading.Thread(target=_pipeline_worker, name=f"pipeline-{i}", daemon=True)
+                t.start()
+                _JOB_WORKERS.append(t)
+
+
+_SAVE_CHUNK = 1 << 20
+
+
+def _save_upload(fs: Any, path: str) -> None:
+    # 1 MiB chunks instead of FileStorage.save()'s 16 KB default
+    with open(path, "wb") as dst:
+        shutil.copyfileobj(fs.stream, dst, length=_SAVE_CHUNK)
 
 
 # ----------------------------
@@ -239,16 +264,68 @@ def _compute_match_overview(
     csv2_trello_id_col: str,
     preview_limit: int = 100,
 ) -> dict[str, Any]:
-    csv1 = read_csv_rows(csv1_path, delimiter=delim1)
-    csv2 = read_csv_rows(csv2_path, delimiter=delim2)
-
-    email_to_trello_ids: dict[str, list[str]] = {}
-    for r in csv2:
-        em = normalize_email(r.get(csv2_email_col, ""))
-        tid = (r.get(csv2_trello_id_col, "") or "").strip()
-        if not em or not tid:
-            continue
-        email_to_trello_ids.setdefault(em, []).append(tid)
+    """
+    Match overview for /preview. Repeated submits of the same mapping are served from
+    an in-process LRU (keyed by file signatures), otherwise scanned.
+    The returned dict is shared between callers; treat it as read-only.
+    """
+    cols = (csv1_email_col, csv1_hubspot_id_col, csv2_email_col, csv2_trello_id_col)
+    try:
+        st1 = os.stat(csv1_path)
+        st2 = os.stat(csv2_path)
+    except OSError:
+        return _scan_match_overview(csv1_path, csv2_path, delim1, delim2, *cols, preview_limit)
+    return _compute_match_overview_cached(
+        csv1_path,
+        csv2_path,
+        delim1,
+        delim2,
+        cols,
+        (st1.st_mtime_ns, st1.st_size),
+        (st2.st_mtime_ns, st2.st_size),
+        preview_limit,
+    )
+
+
+@functools.lru_cache(maxsize=16)
+def _compute_match_overview_cached(
+    csv1_path: str,
+    csv2_path: str,
+    delim1: str,
+    delim2: str,
+    cols: tuple[str, str, str, str],
+    sig1: tuple[int, int],
+    sig2: tuple[int, int],
+    preview_limit: int,
+) -> dict[str, Any]:
+    # sig1/sig2 (mtime_ns, size) only take part in the cache key: a re-upload misses
+    return _scan_match_overview(csv1_path, csv2_path, delim1, delim2, *cols, preview_limit)
+
+
+def _scan_match_overview(
+    csv1_path: str,
+    csv2_path: str,
+    delim1: str,
+    delim2: str,
+    csv1_email_col: str,
+    csv1_hubspot_id_col: str,
+    csv2_email_col: str,
+    csv2_trello_id_col: str,
+    preview_limit: int,
+) -> dict[str, Any]:
+    # Single pass per file, only the two mapped columns (no dict per row).
+    # filter(all, ...) drops rows with an empty raw value in C before any Python work;
+    # hot callables are bound to locals.
+    ne = normalize_email
+
+    # email -> trello ids, de-duplicated at ingest (dict keeps insertion order)
+    email_to_trello_ids: defaultdict[str, dict[str, None]] = defaultdict(dict)
+    for raw_em, raw_tid in filter(all, iter_csv_columns(csv2_path, delim2, [csv2_email_col, csv2_trello_id_col])):
+        em = ne(raw_em)
+        tid = raw_tid.strip()
+        if em and tid:
+            email_to_trello_ids[em][tid] = None
+    lookup = email_to_trello_ids.get
 
     total = 0
     none = 0
@@ -258,30 +335,24 @@ def _compute_match_overview(
     duplicates: list[dict[str, Any]] = []
     singles: list[dict[str, Any]] = []
 
-    for r in csv1:
-        em = normalize_email(r.get(csv1_email_col, ""))
-        hs_id = (r.get(csv1_hubspot_id_col, "") or "").strip()
+    for raw_em, raw_hs_id in filter(all, iter_csv_columns(csv1_path, delim1, [csv1_email_col, csv1_hubspot_id_col])):
+        em = ne(raw_em)
+        hs_id = raw_hs_id.strip()
         if not em or not hs_id:
             continue
 
         total += 1
-        trello_ids = email_to_trello_ids.get(em, [])
+        uniq_map = lookup(em)
+        n = 0 if uniq_map is None else len(uniq_map)
 
-        seen = set()
-        uniq = []
-        for tid in trello_ids:
-            if tid not in seen:
-                seen.add(tid)
-                uniq.append(tid)
-
-        if len(uniq) == 0:
+        if n == 0:
             none += 1
             continue
 
-        if len(uniq) == 1:
+        if n == 1:
             single += 1
             if len(singles) < preview_limit:
-                tid = uniq[0]
+                tid = next(iter(uniq_map))
                 singles.append(
                     {
                         "email": em,
@@ -294,6 +365,7 @@ def _compute_match_overview(
 
         multi += 1
         if len(duplicates) < preview_limit:
+            uniq = list(uniq_map)
             duplicates.append(
                 {
                     "email": em,
@@ -313,51 +385,93 @@ def _compute_match_overview(
     }
 
 
+def _render_options(cols: list[str]) -> Markup:
+    # each column name escaped once; the same markup feeds both selects of a CSV
+    return Markup("".join(f'<option value="{c}">{c}</option>' for c in map(escape, cols)))
+
+
+def _render_duplicate_rows(duplicates: list[dict[str, Any]]) -> Markup:
+    if not duplicates:
+        return Markup('<tr><td colspan="3" class="muted">Keine doppelten Trello-IDs ✅</td></tr>')
+    out: list[str] = []
+    for row in duplicates:
+        ids_html = "".join(f"<div><code>{escape(tid)}</code></div>" for tid in row["trello_ids"])
+        links_html = "".join(
+            f'<div><a href="{link}" target="_blank">{link}</a></div>' for link in map(escape, row["links"])
+        )
+        out.append(
+            "<tr>"
+            f"<td><code>{escape(row['email'])}</code></td>"
+            f"<td>{ids_html}</td>"
+            f"<td>{links_html}</td>"
+            "</tr>\n"
+        )
+    return Markup("".join(out))
+
+
+def _render_single_rows(singles: list[dict[str, Any]]) -> Markup:
+    if not singles:
+        return Markup('<tr><td colspan="4" class="muted">Keine verarbeitbaren Matches.</td></tr>')
+    out: list[str] = []
+    for row in singles:
+        link = escape(row["link"])
+        out.append(
+            "<tr>"
+            f"<td><code>{escape(row['email'])}</code></td>"
+            f"<td><code>{escape(row['hubspot_contact_id'])}</code></td>"
+            f"<td><code>{escape(row['trello_id'])}</code></td>"
+            f'<td><a href="{link}" target="_blank">{link}</a></td>'
+            "</tr>\n"
+        )
+    return Markup("".join(out))
+
+
 # ----------------------------
 # Routes
 # ----------------------------
 
 @bp_upload.get("/")
 def index():
-    page = _page(UPLOAD_CONTENT, title="Upload · Ex-Kunden Analyse", nav="upload")
-    return render_template_string(page, error="")
+    page = page_template(UPLOAD_CONTENT, title="Upload · Ex-Kunden Analyse", nav="upload")
+    return render_template(page, error="")
 
 
 @bp_upload.post("/upload")
 def upload():
     if "csv1" not in request.files or "csv2" not in request.files:
-        page = _page(UPLOAD_CONTENT, title="Upload · Ex-Kunden Analyse", nav="upload")
-        return render_template_string(page, error="Bitte beide Dateien hochladen.")
+        page = page_template(UPLOAD_CONTENT, title="Upload · Ex-Kunden Analyse", nav="upload")
+        return render_template(page, error="Bitte beide Dateien hochladen.")
 
     f1 = request.files["csv1"]
     f2 = request.files["csv2"]
 
     csv1_path = os.path.join(_TMP_DIR, "csv1.csv")
     csv2_path = os.path.join(_TMP_DIR, "csv2.csv")
-    f1.save(csv1_path)
-    f2.save(csv2_path)
+    _save_upload(f1, csv1_path)
+    _save_upload(f2, csv2_path)
 
     delim1 = detect_delimiter(csv1_path)
     delim2 = detect_delimiter(csv2_path)
 
-    rows1 = read_csv_rows(csv1_path, delimiter=delim1)
-    rows2 = read_csv_rows(csv2_path, delimiter=delim2)
-    if not rows1 or not rows2:
-        page = _page(UPLOAD_CONTENT, title="Upload · Ex-Kunden Analyse", nav="upload")
-        return render_template_string(page, error="Eine der CSVs ist leer oder nicht lesbar.")
+    # Only the header is needed for the mapping dropdowns
+    header1 = read_csv_header(csv1_path, delimiter=delim1)
+    header2 = read_csv_header(csv2_path, delimiter=delim2)
+    if not header1 or not header2:
+        page = page_template(UPLOAD_CONTENT, title="Upload · Ex-Kunden Analyse", nav="upload")
+        return render_template(page, error="Eine der CSVs ist leer oder nicht lesbar.")
 
-    csv1_cols = list(rows1[0].keys())
-    csv2_cols = list(rows2[0].keys())
+    csv1_cols = list(dict.fromkeys(header1))
+    csv2_cols = list(dict.fromkeys(header2))
 
-    page = _page(MAPPING_CONTENT, title="Mapping · Ex-Kunden Analyse", nav="upload")
-    return render_template_string(
+    page = page_template(MAPPING_CONTENT, title="Mapping · Ex-Kunden Analyse", nav="upload")
+    return render_template(
         page,
         csv1_path=csv1_path,
         csv2_path=csv2_path,
         delim1=delim1,
         delim2=delim2,
-        csv1_cols=csv1_cols,
-        csv2_cols=csv2_cols,
+        csv1_options=_render_options(csv1_cols),
+        csv2_options=_render_options(csv2_cols),
     )
 
 
@@ -385,8 +499,8 @@ def preview():
         preview_limit=100,
     )
 
-    page = _page(PREVIEW_CONTENT, title="Preview · Ex-Kunden Analyse", nav="upload")
-    return render_template_string(
+    page = page_template(PREVIEW_CONTENT, title="Preview · Ex-Kunden Analyse", nav="upload")
+    return render_template(
         page,
         csv1_path=csv1_path,
         csv2_path=csv2_path,
@@ -396,6 +510,8 @@ def preview():
         csv1_hubspot_id_col=csv1_hubspot_id_col,
         csv2_email_col=csv2_email_col,
         csv2_trello_id_col=csv2_trello_id_col,
+        duplicates_html=_render_duplicate_rows(overview["duplicates"]),
+        singles_html=_render_single_rows(overview["singles"]),
         **overview,
     )
 
@@ -432,24 +548,19 @@ def start_job():
         }
     )
 
-    t = threading.Thread(
-        target=run_pipeline_job,
-        daemon=True,
-        args=(
-            job_id,
-            app_cfg,
-            trello_cfg,
-            hs_cfg,
-            oa_cfg,
-            csv1_path,
-            csv2_path,
-            delim1,
-            delim2,
-            mapping,
-            extra_user_prompt_step3,
-            render_model,
-        ),
+    _submit_pipeline_job(
+        job_id,
+        app_cfg,
+        trello_cfg,
+        hs_cfg,
+        oa_cfg,
+        csv1_path,
+        csv2_path,
+        delim1,
+        delim2,
+        mapping,
+        extra_user_prompt_step3,
+        render_model,
     )
-    t.start()
 
     return redirect(url_for("job.dashboard", job_id=job_id))
@@ -1,29 +1,189 @@
 # utils_csv.py
 from __future__ import annotations
 import csv
-from typing import Any
+import mmap
+import os
+import re
+from typing import Any, Iterator, Optional
+
+_UTF8_BOM = b"\xef\xbb\xbf"
+# '\r' ohne folgendes '\n' (altes Mac-Zeilenende) -> csv.reader nötig
+_LONE_CR = re.compile(rb"\r(?!\n)")
+
+# Roh-Wert -> normalisierte Email. E-Mails wiederholen sich in den CSVs stark
+# (mehrere Trello-Karten pro Kontakt); Obergrenze verhindert unbegrenztes Wachstum.
+_EMAIL_CACHE: dict[str, str] = {}
+_EMAIL_CACHE_MAX = 200_000
 
 def normalize_email(email: str) -> str:
-    if email is None:
+    if not email:
         return ""
-    return email.strip().lower()
+    v = _EMAIL_CACHE.get(email)
+    if v is not None:
+        return v
+    s = email.strip()
+    if not s.islower():
+        s = s.lower()
+    if len(_EMAIL_CACHE) < _EMAIL_CACHE_MAX:
+        _EMAIL_CACHE[email] = s
+    return s
 
 def read_csv_rows(path: str, delimiter: str = ",") -> list[dict[str, str]]:
     with open(path, "r", encoding="utf-8-sig", newline="") as f:
-        reader = csv.DictReader(f, delimiter=delimiter)
-        return [dict(r) for r in reader]
+        # DictReader already yields a fresh plain dict per row (Python 3.8+)
+        return list(csv.DictReader(f, delimiter=delimiter))
+
+def read_csv_header(path: str, delimiter: str = ",") -> list[str]:
+    """
+    Nur die Header-Zeile ([] bei leerer Datei).
+    """
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f, delimiter=delimiter)
+        return next(reader, [])
+
+def iter_csv_columns(path: str, delimiter: str, colnames: list[str]) -> Iterator[tuple[str, ...]]:
+    """
+    Streamt nur die gewünschten Spalten als Tupel (kein dict pro Zeile).
+    Dateien ohne Anführungszeichen gehen per mmap + Byte-Split (ohne Zeilen-Decode).
+    Fehlende Spalten/Felder liefern "" (wie r.get(col, "") bei read_csv_rows);
+    bei doppelten Headern gewinnt - wie bei DictReader - die letzte Spalte.
+    """
+    mm = _plain_csv_mmap(path, delimiter)
+    if mm is not None:
+        with mm:
+            yield from _iter_mmap_columns(mm, delimiter.encode("ascii"), colnames)
+        return
+
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f, delimiter=delimiter)
+        header = next(reader, None)
+        if header is None:
+            return
+        idx = _column_indices(header, colnames)
+        for row in reader:
+            if not row:
+                continue
+            n = len(row)
+            yield tuple(row[i] if 0 <= i < n else "" for i in idx)
+
+def _column_indices(header: list[str], colnames: list[str]) -> list[int]:
+    pos = {name: i for i, name in enumerate(header)}
+    return [pos.get(c, -1) for c in colnames]
+
+def _plain_csv_mmap(path: str, delimiter: str) -> Optional[mmap.mmap]:
+    """
+    mmap der Datei, wenn ein simples split() pro Zeile exakt csv.reader entspricht:
+    1-Byte-Delimiter, keine Anführungszeichen, Zeilenenden nur LF oder CRLF.
+    Sonst None.
+    """
+    if len(delimiter) != 1 or not delimiter.isascii() or delimiter in "\r\n\"":
+        return None
+    try:
+        fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    except OSError:
+        return None
+    try:
+        if os.fstat(fd).st_size == 0:
+            return None
+        mm = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    finally:
+        os.close(fd)
+    if mm.find(b'"') != -1 or _LONE_CR.search(mm) is not None:
+        mm.close()
+        return None
+    return mm
+
+def _iter_mmap_columns(mm: mmap.mmap, delim: bytes, colnames: list[str]) -> Iterator[tuple[str, ...]]:
+    """
+    Zeilen per mm.readline() (C-Schleife); gesplittet wird nur bis zur letzten
+    benötigten Spalte, dekodiert werden nur Header und die gewünschten Felder.
+    """
+    if mm[:len(_UTF8_BOM)] == _UTF8_BOM:
+        mm.seek(len(_UTF8_BOM))
+    readline = mm.readline
+    first = readline()
+    if not first:
+        return
+    # erste Zeile ist immer der Header (auch wenn leer, wie bei csv.reader)
+    head = first.rstrip(b"\r\n")
+    idx = _column_indices(head.decode("utf-8").split(delim.decode("ascii")) if head else [], colnames)
+    maxsplit = max(idx) + 1 if idx else 0
+    for line in iter(readline, b""):
+        line = line.rstrip(b"\r\n")
+        if not line:
+            continue
+        fields = line.split(delim, maxsplit)
+        n = len(fields)
+        yield tuple([fields[i].decode("utf-8") if 0 <= i < n else "" for i in idx])
 
 def write_csv_rows(path: str, rows: list[dict[str, Any]], fieldnames: list[str], delimiter: str = ",") -> None:
     with open(path, "w", encoding="utf-8", newline="") as f:
         writer = csv.DictWriter(f, fieldnames=fieldnames, delimiter=delimiter)
         writer.writeheader()
-        for r in rows:
-            writer.writerow(r)
+        writer.writerows(rows)
+
+_DELIM_CANDIDATES = (",", ";", "\t", "|")
+_DELIM_SAMPLE = 4096
+_DELIM_CACHE: dict[tuple[str, int, int], str] = {}
+_DELIM_CACHE_MAX = 256
+
+def _guess_delimiter(head: str, complete: bool) -> str:
+    """
+    Zählt Kandidaten nur außerhalb von Anführungszeichen (ein Durchlauf).
+    Höchste Gesamtzahl gewinnt; bei Gleichstand die Spaltenzahl mit geringster
+    Varianz über die Zeilen, danach die Reihenfolge in _DELIM_CANDIDATES.
+    """
+    totals = dict.fromkeys(_DELIM_CANDIDATES, 0)
+    per_line: list[dict[str, int]] = []
+    line = dict.fromkeys(_DELIM_CANDIDATES, 0)
+    in_quote = False
+    for ch in head:
+        if ch == '"':
+            in_quote = not in_quote
+        elif in_quote:
+            continue
+        elif ch in line:
+            line[ch] += 1
+            totals[ch] += 1
+        elif ch == "\n":
+            per_line.append(line)
+            line = dict.fromkeys(_DELIM_CANDIDATES, 0)
+    # letzte Zeile nur werten, wenn die Datei komplett im Sample liegt
+    if complete and any(line.values()):
+        per_line.append(line)
+
+    def variance(d: str) -> float:
+        counts = [ln[d] for ln in per_line]
+        if not counts:
+            return 0.0
+        mean = sum(counts) / len(counts)
+        return sum((c - mean) ** 2 for c in counts) / len(counts)
+
+    best = max(totals.values())
+    if best == 0:
+        return ","
+    tied = [d for d in _DELIM_CANDIDATES if totals[d] == best]
+    if len(tied) == 1:
+        return tied[0]
+    return min(tied, key=variance)
 
 def detect_delimiter(sample_path: str) -> str:
     """
-    Einfacher Delimiter-Guess: ',' vs ';'
+    Delimiter-Guess (',', ';', Tab, '|') anhand der ersten 4 KB, quote-aware.
+    Ergebnis wird pro (Pfad, mtime, Größe) gecacht.
     """
+    st = os.stat(sample_path)
+    key = (sample_path, st.st_mtime_ns, st.st_size)
+    cached = _DELIM_CACHE.get(key)
+    if cached is not None:
+        return cached
     with open(sample_path, "r", encoding="utf-8-sig", newline="") as f:
-        head = f.read(4096)
-    return ";" if head.count(";") > head.count(",") else ","
+        head = f.read(_DELIM_SAMPLE)
+        complete = len(head) < _DELIM_SAMPLE or not f.read(1)
+    delim = _guess_delimiter(head, complete)
+    if len(_DELIM_CACHE) >= _DELIM_CACHE_MAX:
+        _DELIM_CACHE.clear()
+    _DELIM_CACHE[key] = delim
+    return delim
@@ -0,0 +1,53 @@
+# utils_json.py
+from __future__ import annotations
+import json
+import os
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # optional speedup, stdlib json is the fallback
+    orjson = None
+
+def loads(data: bytes | str) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def read_file_bytes(path: str) -> bytes:
+    """
+    Whole file in one os.read sized from fstat (no buffered file object).
+    Falls back to reading until EOF if the size was wrong (growing/special files).
+    """
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        size = os.fstat(fd).st_size
+        data = os.read(fd, size) if size else b""
+        if size and len(data) == size:
+            return data
+        parts = [data]
+        while True:
+            chunk = os.read(fd, 64 * 1024)
+            if not chunk:
+                break
+            parts.append(chunk)
+        return b"".join(parts)
+    finally:
+        os.close(fd)
+
+def read_json_file(path: str) -> Any:
+    """
+    Reads raw bytes and decodes in one go (no TextIOWrapper in between).
+    Raises like json.load on missing/invalid files.
+    """
+    return loads(read_file_bytes(path))
+
+def dumps_bytes(obj: Any, indent: bool = False) -> bytes:
+    """
+    UTF-8 encoded JSON; non-ASCII is kept as-is (like ensure_ascii=False).
+    indent=True matches json.dumps(..., indent=2).
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, option=option)
+    return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None).encode("utf-8")